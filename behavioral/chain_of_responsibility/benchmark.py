@@ -0,0 +1,63 @@
+"""
+Compares the static Bootloader chain with the adaptive and compiled ones on
+a skewed workload: most requests are "NVIDIA", whose handler sits at the end
+of a chain padded with a few dozen other services.
+
+    python benchmark.py [requests]
+"""
+
+from random import Random
+import sys
+import time
+
+from cor import *
+
+
+class Service(AbstractBootloader):
+    commutative = True
+
+    def __init__(self, name: str) -> None:
+        self.request_keys = (name,)
+
+    def process(self, request: Any) -> str:
+        return f"Service: {request} started..."
+
+
+def build_chain(padding: int = 30) -> AbstractBootloader:
+    head = WindowManager()
+    handler = head.set_next(Taskbar())
+    for index in range(padding):
+        handler = handler.set_next(Service(f"service-{index}"))
+    handler.set_next(Drivers())
+    return head
+
+
+def workload(requests: int, padding: int = 30, seed: int = 4) -> List[str]:
+    rng = Random(seed)
+    others = ["xfce", "Pico"] + [f"service-{index}" for index in range(padding)]
+    return ["NVIDIA" if rng.random() < 0.9 else rng.choice(others)
+            for _ in range(requests)]
+
+
+def run(name: str, loader: Any, requests: List[str]) -> None:
+    handle = loader.handle
+    started = time.perf_counter()
+    for request in requests:
+        handle(request)
+    elapsed = time.perf_counter() - started
+
+    walk = f"{loader.average_walk:6.2f}" if isinstance(loader, AdaptiveChain) else "     -"
+    print(f"{name:<24} {elapsed / len(requests) * 1e9:10.0f} ns/request   avg walk {walk}")
+
+
+if __name__ == "__main__":
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    requests = workload(total)
+
+    print(f"{total} requests, 90% NVIDIA, Drivers last in a chain of 33 handlers\n")
+
+    run("static (handle)", build_chain(), requests)
+    run("static (walk counted)", AdaptiveChain(build_chain(), period=None), requests)
+    run("adaptive count", AdaptiveChain(build_chain(), policy="count"), requests)
+    run("adaptive move-to-front", AdaptiveChain(build_chain(), policy="move-to-front", period=64), requests)
+    run("compiled", build_chain().compile(), requests)
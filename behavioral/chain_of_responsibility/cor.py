@@ -1,7 +1,11 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import Any, Optional
+from collections import deque
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+import asyncio
+import inspect
 import time
+import weakref
 
 class Bootloader(ABC):
     @abstractmethod
@@ -16,58 +20,502 @@ class Bootloader(ABC):
 class AbstractBootloader(Bootloader):
     _next_handler: Bootloader = None
 
+    """
+    Handlers that start a fixed set of software list it in request_keys, so a
+    compiled chain can find them with a dict lookup. Handlers with a fuzzier
+    rule override matches() instead and are evaluated in chain order.
+    """
+    request_keys: Tuple[Any, ...] = ()
+
+    # Commutative handlers never compete for the same request, so an
+    # AdaptiveChain is free to reorder them among each other.
+    commutative: bool = False
+
     def set_next(self, handler: Bootloader) -> Bootloader:
         self._next_handler = handler
+        # Only the compiled and adaptive chains built over this handler need
+        # to rebuild, see _watch().
+        for chain in self.__dict__.get("_dependents", ()):
+            chain._stale = True
         # Returning a handler from here will let us link handlers in a
         # convenient way like this:
         # monkey.set_next(squirrel).set_next(dog)
         return handler
 
+    def matches(self, request: Any) -> bool:
+        return request in self.request_keys
+
     @abstractmethod
+    def process(self, request: Any) -> str:
+        """
+        Start the software for a request this handler matches(). Every
+        concrete handler provides it.
+        """
+        pass
+
     def handle(self, request: Any) -> str:
-        if self._next_handler:
-            return self._next_handler.handle(request)
+        # Walk the chain in a loop rather than recursing, so long chains do
+        # not hit the recursion limit. Handlers that override handle() keep
+        # their own logic and take over the rest of the chain.
+        handler = self
+        while True:
+            if handler.matches(request):
+                return handler.process(request)
+
+            handler = handler._next_handler
+            if handler is None:
+                return None
+            if not _is_transparent(handler):
+                return handler.handle(request)
+
+    def compile(self) -> CompiledChain:
+        return CompiledChain(self)
+
+    def instrument(self, metrics: Optional[ChainMetrics] = None) -> ChainMetrics:
+        """
+        Start recording per-handler statistics for every handler linked from
+        this one. Instrumentation wraps matches() and process() on the handler
+        instances only, so an uninstrumented chain pays nothing for it.
+        """
+
+        if metrics is None:
+            metrics = ChainMetrics()
+
+        for handler in _walk_links(self):
+            metrics.attach(handler)
+
+        return metrics
+
+    def uninstrument(self) -> None:
+        for handler in _walk_links(self):
+            ChainMetrics.detach(handler)
+
+
+def _is_transparent(handler: Bootloader) -> bool:
+    # Comparing the class attribute also rules out foreign Bootloaders, and is
+    # much cheaper than an isinstance() check against an ABC.
+    return type(handler).handle is AbstractBootloader.handle
+
+
+def _walk_chain(head: Bootloader) -> Tuple[List[AbstractBootloader], Optional[Bootloader]]:
+    """
+    Collect the handlers linked from head. The walk stops at the first handler
+    that overrides handle(), which is returned as the tail of the chain.
+    """
+
+    handlers = []
+    seen = set()
+    handler = head
+
+    while handler is not None:
+        if id(handler) in seen:
+            raise ValueError("Bootloader chain contains a cycle.")
+        seen.add(id(handler))
+
+        if not _is_transparent(handler):
+            return handlers, handler
+
+        handlers.append(handler)
+        handler = handler._next_handler
+
+    return handlers, None
+
+
+def _walk_links(head: Bootloader) -> List[AbstractBootloader]:
+    handlers = []
+    seen = set()
+    handler = head
+
+    while isinstance(handler, AbstractBootloader):
+        if id(handler) in seen:
+            raise ValueError("Bootloader chain contains a cycle.")
+        seen.add(id(handler))
+
+        handlers.append(handler)
+        handler = handler._next_handler
+
+    return handlers
+
+
+def _watch(chain: Any, old: List[AbstractBootloader], new: List[AbstractBootloader]) -> None:
+    """
+    Have set_next() on any of the `new` handlers mark `chain` as stale, and
+    stop the `old` ones from doing so.
+    """
+
+    for handler in old:
+        dependents = handler.__dict__.get("_dependents")
+        if dependents is not None:
+            dependents.discard(chain)
+    for handler in new:
+        handler.__dict__.setdefault("_dependents", weakref.WeakSet()).add(chain)
+    chain._stale = False
+
+
+_NOT_FOUND = (float("inf"), None)
+
+
+class CompiledChain:
+    """
+    A flat dispatcher for a chain linked with set_next(). Keyed handlers are
+    found with a single dict lookup, handlers overriding matches() are checked
+    in chain order, and the first matching handler still wins. The table is
+    rebuilt lazily the next time it is used after set_next() rewires one of
+    its handlers.
+    """
+
+    def __init__(self, head: Bootloader) -> None:
+        self._head = head
+        self._stale = True
+        self._handlers: List[AbstractBootloader] = []
+        self._keys: Dict[Any, Tuple[float, AbstractBootloader]] = {}
+        self._predicates: Tuple[Tuple[int, AbstractBootloader], ...] = ()
+        self._tail: Optional[Bootloader] = None
+
+    def compile(self) -> None:
+        handlers, tail = _walk_chain(self._head)
+
+        keys = {}
+        predicates = []
+        for position, handler in enumerate(handlers):
+            if type(handler).matches is AbstractBootloader.matches:
+                for key in handler.request_keys:
+                    keys.setdefault(key, (position, handler))
+            else:
+                predicates.append((position, handler))
+
+        self._keys = keys
+        self._predicates = tuple(predicates)
+        self._tail = tail
+        _watch(self, self._handlers, handlers)
+        self._handlers = handlers
+
+    def handle(self, request: Any) -> Optional[str]:
+        if self._stale:
+            self.compile()
+
+        try:
+            position, handler = self._keys.get(request, _NOT_FOUND)
+        except TypeError:
+            # Unhashable requests can only be served by predicate handlers.
+            position, handler = _NOT_FOUND
+
+        for index, candidate in self._predicates:
+            if index > position:
+                break
+            if candidate.matches(request):
+                return candidate.process(request)
+
+        if handler is not None:
+            return handler.process(request)
+
+        if self._tail is not None:
+            return self._tail.handle(request)
 
         return None
 
 
-class Drivers(AbstractBootloader):
-    def handle(self, request: Any) -> str:
-        if request == "NVIDIA":
-            return f"Drivers: {request} started..."
+class HandlerStats:
+    """
+    Counters for a single handler. A call is a request that reached the
+    handler; it either matched (and was processed) or fell through to the
+    next one. Latencies of processed requests are kept in a bounded window
+    for the percentiles.
+    """
+
+    def __init__(self, window: int) -> None:
+        self._latencies = deque(maxlen=window)
+        self.clear()
+
+    def clear(self) -> None:
+        self.calls = 0
+        self.matches = 0
+        self.fall_throughs = 0
+        self.latency_total = 0.0
+        self.fall_through_time = 0.0
+        self._latencies.clear()
+
+    def record_match(self, elapsed: float) -> None:
+        self.calls += 1
+        self.matches += 1
+        self.latency_total += elapsed
+        self._latencies.append(elapsed)
+
+    def record_fall_through(self, elapsed: float) -> None:
+        self.calls += 1
+        self.fall_throughs += 1
+        self.fall_through_time += elapsed
+
+    def percentile(self, fraction: float) -> float:
+        if not self._latencies:
+            return 0.0
+
+        ordered = sorted(self._latencies)
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "matches": self.matches,
+            "fall_throughs": self.fall_throughs,
+            "hit_rate": self.matches / self.calls if self.calls else 0.0,
+            "latency_total": self.latency_total,
+            "latency_p50": self.percentile(0.50),
+            "latency_p90": self.percentile(0.90),
+            "latency_p99": self.percentile(0.99),
+            "fall_through_time": self.fall_through_time,
+        }
+
+
+class ChainMetrics:
+    """
+    Per-handler statistics for instrumented chains, see
+    AbstractBootloader.instrument(). Coroutine handlers are timed up to the
+    creation of their coroutine only.
+    """
+
+    def __init__(self, window: int = 1024) -> None:
+        self._window = window
+        self._stats: Dict[AbstractBootloader, HandlerStats] = {}
+
+    def attach(self, handler: AbstractBootloader) -> None:
+        self.detach(handler)
+
+        stats = self._stats.setdefault(handler, HandlerStats(self._window))
+        matches = handler.matches
+        process = handler.process
+        clock = time.perf_counter
+
+        def timed_matches(request: Any) -> bool:
+            started = clock()
+            matched = matches(request)
+            if not matched:
+                stats.record_fall_through(clock() - started)
+            return matched
+
+        def timed_process(request: Any) -> str:
+            started = clock()
+            result = process(request)
+            stats.record_match(clock() - started)
+            return result
+
+        handler.matches = timed_matches
+        handler.process = timed_process
+
+    @staticmethod
+    def detach(handler: AbstractBootloader) -> None:
+        handler.__dict__.pop("matches", None)
+        handler.__dict__.pop("process", None)
+
+    def stats(self, handler: AbstractBootloader) -> HandlerStats:
+        return self._stats[handler]
+
+    def reset(self) -> None:
+        for stats in self._stats.values():
+            stats.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Statistics keyed by handler class name, in the order the handlers were
+        instrumented. Repeated class names get a #n suffix.
+        """
+
+        snapshot = {}
+        for handler, stats in self._stats.items():
+            name = type(handler).__name__
+            suffix = 2
+            while name in snapshot:
+                name = f"{type(handler).__name__}#{suffix}"
+                suffix += 1
+            snapshot[name] = stats.snapshot()
+
+        return snapshot
+
+
+class AdaptiveChain:
+    """
+    Serves requests through a chain linked with set_next() and periodically
+    reorders its own copy of the handler list so the handlers matching most
+    often are asked first. The links between the handlers are never changed,
+    so the caller's head and any other reference into the chain keep working
+    as before. Only runs of consecutive commutative handlers are reordered;
+    any other handler stays in place and acts as a barrier.
+
+    The "count" policy sorts by match count, halving the counts after each
+    reorder so the order follows shifts in traffic. The "move-to-front"
+    policy sorts by the most recent match; with period=1 it is classic
+    move-to-front. A period of None never reorders.
+    """
+
+    POLICIES = ("count", "move-to-front")
+
+    def __init__(self, head: Bootloader, policy: str = "count",
+                 period: Optional[int] = 256) -> None:
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown policy {policy!r}, expected one of {self.POLICIES}.")
+        if period is not None and period < 1:
+            raise ValueError("period must be at least 1.")
+
+        self._head = head
+        self._policy = policy
+        self._period = period
+        self._counts: Dict[AbstractBootloader, float] = {}
+        self._last_match: Dict[AbstractBootloader, int] = {}
+        self._requests = 0
+        self._walked = 0
+        self._handlers: List[AbstractBootloader] = []
+        self._load()
+
+    def _load(self) -> None:
+        handlers, self._tail = _walk_chain(self._head)
+        _watch(self, self._handlers, handlers)
+        self._handlers = self._arrange(handlers)
+
+    @property
+    def head(self) -> Bootloader:
+        return self._head
+
+    @property
+    def average_walk(self) -> float:
+        """
+        Average number of handlers asked whether they match a request.
+        """
+
+        return self._walked / self._requests if self._requests else 0.0
+
+    def handle(self, request: Any) -> Optional[str]:
+        if self._stale:
+            self._load()
+
+        self._requests += 1
+        walked = 0
+        result = None
+
+        for handler in self._handlers:
+            walked += 1
+            if handler.matches(request):
+                self._counts[handler] = self._counts.get(handler, 0) + 1
+                self._last_match[handler] = self._requests
+                result = handler.process(request)
+                break
         else:
-            return super().handle(request)
+            if self._tail is not None:
+                result = self._tail.handle(request)
+
+        self._walked += walked
+
+        if self._period is not None and self._requests % self._period == 0:
+            self.reorder()
+
+        return result
+
+    def _rank(self, handler: AbstractBootloader) -> float:
+        if self._policy == "count":
+            return -self._counts.get(handler, 0)
+        return -self._last_match.get(handler, 0)
+
+    def _arrange(self, handlers: List[AbstractBootloader]) -> List[AbstractBootloader]:
+        ordered = []
+        run = []
+        for handler in handlers:
+            if handler.commutative:
+                run.append(handler)
+            else:
+                ordered.extend(sorted(run, key=self._rank))
+                ordered.append(handler)
+                run = []
+        ordered.extend(sorted(run, key=self._rank))
+        return ordered
+
+    def reorder(self) -> None:
+        self._handlers = self._arrange(self._handlers)
+
+        if self._policy == "count":
+            for handler in self._counts:
+                self._counts[handler] /= 2
+
+
+class Drivers(AbstractBootloader):
+    commutative = True
+    request_keys = ("NVIDIA",)
+
+    def process(self, request: Any) -> str:
+        return f"Drivers: {request} started..."
     
 
 class Taskbar(AbstractBootloader):
-    def handle(self, request: Any) -> str:
-        if request == "Pico":
-            return f"Taskbar: {request} started..."
-        else:
-            return super().handle(request)
+    commutative = True
+    request_keys = ("Pico",)
+
+    def process(self, request: Any) -> str:
+        return f"Taskbar: {request} started..."
 
 
 class WindowManager(AbstractBootloader):
-    def handle(self, request: Any) -> str:
-        if request == "xfce":
-            return f"Window Manager: {request} started..."
-        else:
-            return super().handle(request)
+    commutative = True
+    request_keys = ("xfce",)
+
+    def process(self, request: Any) -> str:
+        return f"Window Manager: {request} started..."
+
+
+class BootResult(NamedTuple):
+    request: Any
+    result: Optional[str]
+    latency: float
+
+
+def handle_batch(loader: Bootloader, requests: Iterable[Any]) -> List[BootResult]:
+    """
+    Push every request through the chain and return the results in request
+    order, together with the time each one spent in the chain.
+    """
+
+    handle = loader.handle
+    clock = time.perf_counter
+    results = []
+
+    for request in requests:
+        started = clock()
+        result = handle(request)
+        results.append(BootResult(request, result, clock() - started))
+
+    return results
+
+
+async def handle_batch_async(loader: Bootloader, requests: Iterable[Any],
+                             limit: int = 10) -> List[BootResult]:
+    """
+    Asyncio flavour of handle_batch(). Handlers may return coroutines from
+    process(), which are awaited, and at most `limit` requests are in flight
+    at once. Results keep the request order; latency excludes the time spent
+    waiting for a free slot.
+    """
+
+    if limit < 1:
+        raise ValueError("limit must be at least 1.")
+
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(request: Any) -> BootResult:
+        async with semaphore:
+            started = time.perf_counter()
+            result = loader.handle(request)
+            if inspect.isawaitable(result):
+                result = await result
+            return BootResult(request, result, time.perf_counter() - started)
+
+    return list(await asyncio.gather(*(run(request) for request in requests)))
 
 
 class Client:
     @staticmethod
     def client_code(loader: Bootloader) -> None:
 
-        for software in ['NVIDIA', 'Pico', 'xfce']:
-            print(f'Trying to start {software}...')
-
-            result = loader.handle(software)
+        for boot in handle_batch(loader, ['NVIDIA', 'Pico', 'xfce']):
+            print(f'Trying to start {boot.request}...')
 
-            if result:
-                print(f'[INFO] {result}')
+            if boot.result:
+                print(f'[INFO] {boot.result} ({boot.latency * 1e6:.1f} us)')
             else:
                 print(f'[INFO] Error, service could not start.')
-            
-            time.sleep(1)
-            
\ No newline at end of file
@@ -0,0 +1,57 @@
+"""
+Dispatch cost of RoutingMediator against an if/elif style chain of string
+comparisons, as the number of registered event types grows. Events are
+picked uniformly, so the chain scans half of its branches on average.
+
+    python benchmark.py [dispatches]
+"""
+
+from random import Random
+import sys
+import time
+
+from mediator import *
+
+
+class Component(BaseComponent):
+    pass
+
+
+class ComparisonMediator(Mediator):
+    """
+    Stand-in for a hand-written if/elif chain with one branch per event.
+    """
+
+    def __init__(self, events: List[str]) -> None:
+        self._events = events
+
+    def notify(self, sender: object, event: str) -> None:
+        for candidate in self._events:
+            if event == candidate:
+                return
+
+
+def measure(mediator: Mediator, sender: object, events: List[str]) -> float:
+    notify = mediator.notify
+    started = time.perf_counter()
+    for event in events:
+        notify(sender, event)
+    return (time.perf_counter() - started) / len(events) * 1e9
+
+
+if __name__ == "__main__":
+    dispatches = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rng = Random(9)
+    sender = Component()
+
+    print(f"{'event types':>12} {'routing ns':>12} {'if/elif ns':>12}")
+    for size in (10, 100, 1_000, 10_000):
+        names = [f"event-{index}" for index in range(size)]
+        events = [rng.choice(names) for _ in range(dispatches)]
+
+        routing = RoutingMediator()
+        for name in names:
+            routing.subscribe(name, lambda sender, event: None, sender=Component)
+
+        print(f"{size:>12} {measure(routing, sender, events):>12.0f} "
+              f"{measure(ComparisonMediator(names), sender, events):>12.0f}")
@@ -3,6 +3,13 @@
 
 from __future__ import annotations
 from abc import ABC
+from collections import Counter, deque
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+import asyncio
+import inspect
+
+
+Handler = Callable[[object, str], None]
 
 
 class Mediator(ABC):
@@ -16,23 +23,188 @@ class Mediator(ABC):
         pass
 
 
-class StartMenu(Mediator):
-    def __init__(self, option_1: Shutdown, option_2: Sleep) -> None:
+# Wildcard event name for RoutingMediator.subscribe().
+ANY_EVENT = "*"
+
+
+class RoutingMediator(Mediator):
+    """
+    A Mediator that dispatches through a table of handlers keyed by
+    (sender type, event) instead of comparing event names one by one.
+
+    A handler registered for a class also receives events from its
+    subclasses; sender=None matches any sender and ANY_EVENT any event. The
+    handlers for a concrete (sender type, event) pair are resolved once, most
+    specific first, and cached, so dispatch is a single dict lookup no matter
+    how many events are registered. Events nobody handles are counted in
+    `unhandled` and passed to `on_unhandled` when given.
+    """
+
+    def __init__(self, on_unhandled: Optional[Callable[[object, str], None]] = None,
+                 queued: bool = False, batch: bool = False) -> None:
+        self._routes: Dict[Tuple[Optional[type], str], List[Handler]] = {}
+        self._resolved: Dict[Tuple[type, str], Tuple[Handler, ...]] = {}
+        self.unhandled: Counter = Counter()
+        self.on_unhandled = on_unhandled
+
+        self._queued = queued
+        self._batch = batch
+        self._queue: Deque[Tuple[object, str]] = deque()
+        self._pending: Set[Tuple[int, str]] = set()
+        self._draining = False
+        self.batched = 0
+
+    def subscribe(self, event: str, handler: Handler, sender: Optional[type] = None) -> None:
+        self._routes.setdefault((sender, event), []).append(handler)
+        self._resolved.clear()
+
+    def unsubscribe(self, event: str, handler: Handler, sender: Optional[type] = None) -> None:
+        handlers = self._routes.get((sender, event), [])
+        if handler not in handlers:
+            raise ValueError(f"{handler!r} is not subscribed to {event!r}.")
+
+        handlers.remove(handler)
+        if not handlers:
+            del self._routes[(sender, event)]
+        self._resolved.clear()
+
+    def _resolve(self, sender_type: type, event: str) -> Tuple[Handler, ...]:
+        handlers = []
+        for cls in sender_type.__mro__ + (None,):
+            handlers += self._routes.get((cls, event), ())
+            if event != ANY_EVENT:
+                handlers += self._routes.get((cls, ANY_EVENT), ())
+
+        return tuple(dict.fromkeys(handlers))
+
+    def _handlers(self, sender: object, event: str) -> Tuple[Handler, ...]:
+        key = (type(sender), event)
+        handlers = self._resolved.get(key)
+        if handlers is None:
+            handlers = self._resolved[key] = self._resolve(*key)
+
+        if not handlers:
+            self.unhandled[(type(sender).__name__, event)] += 1
+            if self.on_unhandled is not None:
+                self.on_unhandled(sender, event)
+
+        return handlers
+
+    def _enqueue(self, sender: object, event: str) -> bool:
+        if self._batch:
+            key = (id(sender), event)
+            if key in self._pending:
+                self.batched += 1
+                return False
+            self._pending.add(key)
+
+        self._queue.append((sender, event))
+        return True
+
+    def _dequeue(self) -> Tuple[object, str]:
+        sender, event = self._queue.popleft()
+        if self._batch:
+            self._pending.discard((id(sender), event))
+        return sender, event
+
+    def notify(self, sender: object, event: str) -> None:
+        """
+        In queued mode, events raised while another one is being dispatched
+        are appended to a queue and handled after it, in order, by the
+        outermost notify() call instead of recursing. With batch on, an
+        event already waiting in the queue for the same sender is not queued
+        again. If a handler raises, the remaining events stay queued and are
+        handled by the next notify().
+        """
+
+        if not self._queued:
+            for handler in self._handlers(sender, event):
+                handler(sender, event)
+            return
+
+        self._enqueue(sender, event)
+        if self._draining:
+            return
+
+        self._draining = True
+        try:
+            while self._queue:
+                sender, event = self._dequeue()
+                for handler in self._handlers(sender, event):
+                    handler(sender, event)
+        finally:
+            self._draining = False
+
+
+class AsyncRoutingMediator(RoutingMediator):
+    """
+    Queued RoutingMediator drained by an asyncio task, for components whose
+    handlers do I/O. notify() stays synchronous so components do not change:
+    it queues the event and makes sure a drain task is running on the current
+    loop. Handlers may be coroutine functions; they are awaited one at a time
+    so events are still handled in order. Await join() to wait for the queue
+    to empty and to see the first handler error, if any.
+    """
+
+    def __init__(self, on_unhandled: Optional[Callable[[object, str], None]] = None,
+                 batch: bool = False) -> None:
+        super().__init__(on_unhandled, queued=True, batch=batch)
+        self._drainer: Optional[asyncio.Task] = None
+        # The first handler error of a drain task that finished unobserved.
+        self._error: Optional[BaseException] = None
+
+    def _collect(self, drainer: asyncio.Task) -> None:
+        if not drainer.cancelled() and drainer.exception() is not None and self._error is None:
+            self._error = drainer.exception()
+
+    def notify(self, sender: object, event: str) -> None:
+        self._enqueue(sender, event)
+        if self._drainer is None or self._drainer.done():
+            if self._drainer is not None:
+                self._collect(self._drainer)
+            self._drainer = asyncio.get_running_loop().create_task(self._drain())
+
+    async def _drain(self) -> None:
+        while self._queue:
+            sender, event = self._dequeue()
+            for handler in self._handlers(sender, event):
+                result = handler(sender, event)
+                if inspect.isawaitable(result):
+                    await result
+
+    async def join(self) -> None:
+        while self._drainer is not None and not self._drainer.done():
+            await asyncio.wait([self._drainer])
+        if self._drainer is not None:
+            drainer, self._drainer = self._drainer, None
+            self._collect(drainer)
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+
+class StartMenu(RoutingMediator):
+    def __init__(self, option_1: Shutdown, option_2: Sleep, queued: bool = False) -> None:
+        super().__init__(queued=queued)
+
         self._option_1 = option_1
         self._option_1.mediator = self
 
         self._option_2 = option_2
         self._option_2.mediator = self
 
+        self.subscribe('Shutdown', self._shut_down, sender=Shutdown)
+        self.subscribe('Sleep', self._go_to_sleep, sender=Sleep)
 
-    def notify(self, sender: object, event: str) -> None:
-        if event == 'Shutdown':
-            print('System shutting down, please wait for:')
-            self._option_1.write_log()
-            self._option_1.close_apps()
-        elif event == 'Sleep':
-            print('System goes to sleep, please wait for:')
-            self._option_1.write_log()
+
+    def _shut_down(self, sender: object, event: str) -> None:
+        print('System shutting down, please wait for:')
+        self._option_1.write_log()
+        self._option_1.close_apps()
+
+    def _go_to_sleep(self, sender: object, event: str) -> None:
+        print('System goes to sleep, please wait for:')
+        self._option_1.write_log()
 
 
 class BaseComponent:
@@ -0,0 +1,93 @@
+"""
+Memory held by the backup history and the latency of undo() for full
+snapshots (ShadowProtect) against deltas with checkpoints
+(IncrementalShadowProtect), on a large state receiving small edits. Then
+the backup() latency seen by the caller when snapshots are serialized and
+compressed on its thread, and when that work moves to the background.
+
+    python benchmark.py [state size] [backups]
+"""
+
+from contextlib import redirect_stdout
+from random import Random
+import os
+import sys
+import time
+import tracemalloc
+
+from memento import *
+
+
+class Document(Backup):
+    """
+    An originator whose large state changes a little between backups.
+    """
+
+    def __init__(self, size: int, seed: int = 7) -> None:
+        self._rng = Random(seed)
+        super().__init__("".join(self._rng.choice(ascii_letters) for _ in range(size)))
+
+    def edit(self) -> None:
+        position = self._rng.randrange(len(self._state))
+        self._state = self._state[:position] + "".join(sample(ascii_letters, 20)) + self._state[position + 20:]
+
+
+def measure(caretaker_class: type, size: int, backups: int, **options: Any) -> None:
+    document = Document(size)
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    caretaker = caretaker_class(document, **options)
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        for _ in range(backups):
+            caretaker.backup()
+            document.edit()
+        memory = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+
+        # Retention may have evicted old snapshots; only time undos that
+        # actually restore one.
+        undos = len(caretaker._mementos)
+        started = time.perf_counter()
+        for _ in range(undos):
+            caretaker.undo()
+        restore = (time.perf_counter() - started) / max(undos, 1)
+
+    label = caretaker_class.__name__ + "".join(
+        f" {key}={getattr(value, 'max_bytes', value)}" for key, value in options.items())
+    print(f"{label:<56} {memory / 2 ** 20:9.2f} MiB {restore * 1e6:10.1f} us/undo ({undos} undos)")
+
+
+def snapshot_latency(size: int, backups: int, **options: Any) -> None:
+    document = Document(size)
+    caretaker = SerializedShadowProtect(document, **options)
+
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        elapsed = 0.0
+        for _ in range(backups):
+            document.edit()
+            started = time.perf_counter()
+            caretaker.backup()
+            elapsed += time.perf_counter() - started
+        caretaker.close()
+
+    label = "SerializedShadowProtect" + "".join(f" {key}={value}" for key, value in options.items())
+    print(f"{label:<56} {elapsed / backups * 1e6:10.1f} us/backup")
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 256 * 1024
+    backups = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    print(f"{backups} backups of a {size // 1024} KiB state, 20 characters edited between backups\n")
+    measure(ShadowProtect, size, backups)
+    measure(IncrementalShadowProtect, size, backups, checkpoint_every=16)
+    measure(IncrementalShadowProtect, size, backups, checkpoint_every=64)
+    measure(IncrementalShadowProtect, size, backups,
+            retention=RetentionPolicy(max_bytes=4 * size))
+
+    print()
+    snapshot_latency(size, backups, compression="zlib")
+    snapshot_latency(size, backups, compression="zlib", background=True)
+    snapshot_latency(size, backups, compression="lzma")
+    snapshot_latency(size, backups, compression="lzma", background=True)
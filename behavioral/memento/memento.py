@@ -1,8 +1,26 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
+from itertools import islice
 from random import sample
 from string import ascii_letters, digits
+from typing import Any, Iterator, List, NamedTuple, Optional, Tuple, Union
+import bisect
+import json
+import lzma
+import mmap
+import os
+import pickle
+import struct
+import sys
+import time
+import zlib
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 
 class Backup():
@@ -48,9 +66,9 @@ class Memento(ABC):
 
 
 class ConcreteMemento(Memento):
-    def __init__(self, state: str) -> None:
+    def __init__(self, state: str, date: Optional[str] = None) -> None:
         self._state = state
-        self._date = str(datetime.now())[:19]
+        self._date = date if date is not None else str(datetime.now())[:19]
 
 
     def get_state(self) -> str:
@@ -68,27 +86,679 @@ class ShadowProtect():
         self._mementos = []
         self._originator = originator
 
+        # Mementos before the cursor are the undo history. After an undo, the
+        # memento at the cursor holds the current state and the ones after it
+        # can be redone.
+        self._cursor = 0
+
 
     def backup(self) -> None:
         print("\nShadowProtect: Saving Originator's state...")
-        self._mementos.append(self._originator.save())
+        if self._cursor < len(self._mementos):
+            del self._mementos[self._cursor:]
+        self._mementos.append(self._capture())
+        self._cursor = len(self._mementos)
+
+    def _capture(self) -> Memento:
+        return self._originator.save()
 
 
-    def undo(self) -> None:
-        if not len(self._mementos):
+    def undo(self, steps: int = 1) -> None:
+        """
+        Go back `steps` backups with a single restore. Snapshots that fail to
+        restore are skipped in favour of the next older one.
+        """
+
+        if steps < 1 or not self._cursor:
             return
 
-        memento = self._mementos.pop()
+        if self._cursor == len(self._mementos):
+            # Keep the current state around so that it can be redone.
+            self._mementos.append(self._capture())
+            self._cursor = len(self._mementos) - 1
 
-        print(f"ShadowProtect: Restoring state to: {memento.get_name()}")
+        self._jump(max(self._cursor - steps, 0), -1)
 
-        try:
-            self._originator.restore(memento)
-        except Exception:
-            self.undo()
+    def redo(self, steps: int = 1) -> None:
+        if steps < 1 or self._cursor >= len(self._mementos) - 1:
+            return
+
+        self._jump(min(self._cursor + steps, len(self._mementos) - 1), 1)
+
+    def restore(self, position: int) -> None:
+        """
+        Jump to the snapshot at `position`, counting from the oldest one.
+        """
+
+        if position < 0:
+            position += len(self._mementos)
+        if not 0 <= position < len(self._mementos):
+            raise IndexError("ShadowProtect position out of range")
+
+        if position < self._cursor:
+            self.undo(self._cursor - position)
+        elif position > self._cursor:
+            self.redo(position - self._cursor)
+
+    def restore_to(self, moment: Union[str, float, datetime]) -> None:
+        """
+        Jump to the newest snapshot taken at or before `moment`, given as a
+        datetime, a timestamp or a date string as returned by get_date().
+        """
+
+        if isinstance(moment, (int, float)):
+            moment = datetime.fromtimestamp(moment)
+        if isinstance(moment, datetime):
+            moment = str(moment)[:19]
+
+        # Snapshots are appended in time order, so their dates are sorted.
+        position = bisect.bisect_right(self._mementos, moment,
+                                       key=lambda memento: memento.get_date()) - 1
+        if position < 0:
+            raise LookupError(f"No backup at or before {moment}.")
+
+        self.restore(position)
+
+    def _jump(self, target: int, direction: int) -> None:
+        # Step over bad snapshots in a loop rather than recursing.
+        while 0 <= target < len(self._mementos) and target != self._cursor:
+            memento = self._mementos[target]
+
+            print(f"ShadowProtect: Restoring state to: {memento.get_name()}")
+
+            try:
+                self._originator.restore(memento)
+            except Exception:
+                target += direction
+                continue
+
+            self._cursor = target
+            return
 
     def show_history(self) -> None:
         print("ShadowProtect: Here's the list of backups:")
 
-        for memento in self._mementos:
-            print(memento.get_name())
\ No newline at end of file
+        for memento in islice(self._mementos, self._cursor):
+            print(memento.get_name())
+
+
+class RetentionPolicy(NamedTuple):
+    """
+    Limits for a DeltaHistory; None means unlimited. The newest snapshot is
+    always kept.
+    """
+
+    max_count: Optional[int] = None
+    max_bytes: Optional[int] = None
+    max_age: Optional[float] = None
+
+
+class CheckpointMemento(Memento):
+    """
+    A full copy of the state, stored every few snapshots of a DeltaHistory.
+    """
+
+    def __init__(self, state: Any, date: str, created: float) -> None:
+        self._state = state
+        self._date = date
+        self.created = created
+        self.size = sys.getsizeof(state)
+
+    def get_name(self) -> str:
+        return f"{self._date} / ({self._state[0:9]}...)"
+
+    def get_date(self) -> str:
+        return self._date
+
+    def apply(self, previous: Any) -> Any:
+        return self._state
+
+
+class DeltaMemento(Memento):
+    """
+    The edit turning the previous snapshot's state into this one: the slice
+    between the common prefix and the common suffix is replaced by `text`.
+    """
+
+    OVERHEAD = 64
+
+    def __init__(self, start: int, end: int, text: Any, preview: str,
+                 date: str, created: float) -> None:
+        self._start = start
+        self._end = end
+        self._text = text
+        self._preview = preview
+        self._date = date
+        self.created = created
+        self.size = sys.getsizeof(text) + self.OVERHEAD
+
+    def get_name(self) -> str:
+        return f"{self._date} / ({self._preview}...)"
+
+    def get_date(self) -> str:
+        return self._date
+
+    def apply(self, previous: Any) -> Any:
+        return previous[:self._start] + self._text + previous[self._end:]
+
+
+def _common_prefix(old: Any, new: Any) -> int:
+    # Binary search with slice comparisons, which run at C speed.
+    low, high = 0, min(len(old), len(new))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old[:middle] == new[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _common_suffix(old: Any, new: Any, limit: int) -> int:
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old[len(old) - middle:] == new[len(new) - middle:]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+class DeltaHistory:
+    """
+    Snapshot storage for IncrementalShadowProtect. Each snapshot is kept as
+    the single edit from the previous one, with a full checkpoint every
+    `checkpoint_every` snapshots to bound restore cost. States must be
+    sliceable sequences such as str or bytes; anything else is always
+    checkpointed.
+
+    Indexing returns a HistoryMemento, which replays the deltas since the
+    closest checkpoint only when its state is asked for. Iterating yields
+    the stored mementos, which only answer get_name() and get_date().
+    """
+
+    def __init__(self, checkpoint_every: int = 16,
+                 retention: Optional[RetentionPolicy] = None) -> None:
+        if checkpoint_every < 1:
+            raise ValueError("checkpoint_every must be at least 1.")
+
+        self._entries: List[Memento] = []
+        self._checkpoint_every = checkpoint_every
+        self._retention = retention or RetentionPolicy()
+        self._since_checkpoint = 0
+        self._last_state: Any = None
+        self.size = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Memento]:
+        return iter(self._entries)
+
+    def __getitem__(self, index: int) -> HistoryMemento:
+        if index < 0:
+            index += len(self._entries)
+        if not 0 <= index < len(self._entries):
+            raise IndexError("DeltaHistory index out of range")
+
+        return HistoryMemento(self, self._entries[index])
+
+    def __delitem__(self, index: slice) -> None:
+        start, stop, step = index.indices(len(self._entries))
+        if stop != len(self._entries) or step != 1:
+            raise ValueError("Only the tail of a DeltaHistory can be deleted.")
+        if start == len(self._entries):
+            # Nothing to delete; keep the cached last state for the next delta.
+            return
+
+        self.size -= sum(entry.size for entry in self._entries[start:])
+        del self._entries[start:]
+        self._last_state = None
+
+        self._since_checkpoint = 0
+        for entry in reversed(self._entries):
+            if isinstance(entry, CheckpointMemento):
+                break
+            self._since_checkpoint += 1
+
+    def state_of(self, entry: Memento) -> Any:
+        index = entry.serial - self._entries[0].serial if self._entries else -1
+        if not 0 <= index < len(self._entries) or self._entries[index] is not entry:
+            raise LookupError("The snapshot is no longer in the history.")
+        return self._state_at(index)
+
+    def _state_at(self, index: int) -> Any:
+        checkpoint = index
+        while not isinstance(self._entries[checkpoint], CheckpointMemento):
+            checkpoint -= 1
+
+        state = None
+        for entry in self._entries[checkpoint:index + 1]:
+            state = entry.apply(state)
+        return state
+
+    def _diff(self, state: Any, date: str, created: float) -> Memento:
+        previous = self._last_state
+        if self._last_state is None and self._entries:
+            previous = self._state_at(len(self._entries) - 1)
+
+        if previous is None or self._since_checkpoint + 1 >= self._checkpoint_every:
+            return CheckpointMemento(state, date, created)
+
+        try:
+            start = _common_prefix(previous, state)
+            tail = _common_suffix(previous, state, min(len(previous), len(state)) - start)
+            text = state[start:len(state) - tail]
+        except TypeError:
+            return CheckpointMemento(state, date, created)
+
+        return DeltaMemento(start, len(previous) - tail, text, str(state[0:9]), date, created)
+
+    def append(self, memento: Memento) -> None:
+        state = memento.get_state()
+        entry = self._diff(state, memento.get_date(), time.time())
+        entry.serial = self._entries[-1].serial + 1 if self._entries else 0
+
+        self._entries.append(entry)
+        self._last_state = state
+        self._since_checkpoint = 0 if isinstance(entry, CheckpointMemento) else self._since_checkpoint + 1
+        self.size += entry.size
+        self._enforce()
+
+    def pop(self) -> ConcreteMemento:
+        entry = self._entries[-1]
+        memento = ConcreteMemento(self.state_of(entry), entry.get_date())
+        del self[-1:]
+        return memento
+
+    def _expired(self) -> bool:
+        policy = self._retention
+        return ((policy.max_count is not None and len(self._entries) > policy.max_count)
+                or (policy.max_bytes is not None and self.size > policy.max_bytes)
+                or (policy.max_age is not None
+                    and time.time() - self._entries[0].created > policy.max_age))
+
+    def _enforce(self) -> None:
+        while len(self._entries) > 1 and self._expired():
+            oldest = self._entries[0]
+            following = self._entries[1]
+            if not isinstance(following, CheckpointMemento):
+                # The next snapshot loses its base, so it becomes the new
+                # checkpoint.
+                rebased = CheckpointMemento(following.apply(oldest.apply(None)),
+                                            following.get_date(), following.created)
+                rebased.serial = following.serial
+                self.size += rebased.size - following.size
+                self._entries[1] = rebased
+
+            del self._entries[0]
+            self.size -= oldest.size
+            self.evicted += 1
+
+
+class HistoryMemento(Memento):
+    """
+    A snapshot handed out by a DeltaHistory, rebuilt on get_state().
+    """
+
+    def __init__(self, history: DeltaHistory, entry: Memento) -> None:
+        self._history = history
+        self._entry = entry
+
+    def get_state(self) -> Any:
+        return self._history.state_of(self._entry)
+
+    def get_name(self) -> str:
+        return self._entry.get_name()
+
+    def get_date(self) -> str:
+        return self._entry.get_date()
+
+
+class IncrementalShadowProtect(ShadowProtect):
+    """
+    A ShadowProtect keeping its history as deltas with periodic checkpoints
+    and an optional retention policy, see DeltaHistory.
+    """
+
+    def __init__(self, originator: Backup, checkpoint_every: int = 16,
+                 retention: Optional[RetentionPolicy] = None) -> None:
+        super().__init__(originator)
+        self._mementos = DeltaHistory(checkpoint_every, retention)
+
+
+class StoredMemento(Memento):
+    """
+    A snapshot in a MementoStore. Name and date come from the index; the
+    state itself is only read from the log when get_state() is called.
+    """
+
+    def __init__(self, store: MementoStore, position: int, timestamp: float,
+                 preview: str) -> None:
+        self._store = store
+        self._position = position
+        self.timestamp = timestamp
+        self._preview = preview
+
+    def get_state(self) -> str:
+        return self._store.read_state(self._position)
+
+    def get_name(self) -> str:
+        return f"{self.get_date()} / ({self._preview}...)"
+
+    def get_date(self) -> str:
+        return str(datetime.fromtimestamp(self.timestamp))[:19]
+
+
+class MementoStore:
+    """
+    On-disk snapshot history: states are appended to a log file, and a
+    separate index holds one fixed-size record per snapshot (log offset,
+    length, timestamp and a short preview). Both files are read through mmap,
+    so any snapshot can be fetched by position, or found by timestamp with a
+    binary search over the index, without reading the rest of the history.
+
+    Timestamps are taken with time.time() on append and assumed to grow.
+    States are stored as UTF-8 text.
+    """
+
+    RECORD = struct.Struct("<QQd32s")
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._log = open(path, "a+b")
+        self._index = open(path + ".idx", "a+b")
+        self._views = {}
+
+        # Drop a record half-written by a crash.
+        self._length = os.fstat(self._index.fileno()).st_size // self.RECORD.size
+        self._index.truncate(self._length * self.RECORD.size)
+
+    def _view(self, file: Any) -> Union[mmap.mmap, bytes]:
+        size = os.fstat(file.fileno()).st_size
+        view = self._views.get(file)
+        if view is None or len(view) != size:
+            if view is not None:
+                view.close()
+            # mmap refuses empty files.
+            view = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+            self._views[file] = view
+        return view
+
+    def _record(self, position: int) -> Tuple[int, int, float, bytes]:
+        if position < 0:
+            position += self._length
+        if not 0 <= position < self._length:
+            raise IndexError("MementoStore index out of range")
+
+        return self.RECORD.unpack_from(self._view(self._index), position * self.RECORD.size)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, position: int) -> StoredMemento:
+        if position < 0:
+            position += self._length
+        _, _, timestamp, preview = self._record(position)
+        return StoredMemento(self, position, timestamp, preview.rstrip(b"\0").decode("utf-8", "ignore"))
+
+    def __iter__(self) -> Iterator[StoredMemento]:
+        for position in range(self._length):
+            yield self[position]
+
+    def read_state(self, position: int) -> str:
+        offset, length, _, _ = self._record(position)
+        return self._view(self._log)[offset:offset + length].decode("utf-8")
+
+    def timestamp(self, position: int) -> float:
+        return self._record(position)[2]
+
+    def append(self, memento: Memento) -> int:
+        data = memento.get_state().encode("utf-8")
+
+        self._log.seek(0, os.SEEK_END)
+        offset = self._log.tell()
+        self._log.write(data)
+        self._log.flush()
+
+        preview = memento.get_state()[0:9].encode("utf-8")[:32]
+        self._index.write(self.RECORD.pack(offset, len(data), time.time(), preview))
+        self._index.flush()
+
+        self._length += 1
+        return self._length - 1
+
+    def truncate(self, length: int) -> None:
+        """
+        Forget every snapshot from `length` on. Only the index shrinks; the
+        log stays append-only.
+        """
+
+        self._length = max(0, min(length, self._length))
+        self._release(self._index)
+        self._index.truncate(self._length * self.RECORD.size)
+
+    def __delitem__(self, index: slice) -> None:
+        start, stop, step = index.indices(self._length)
+        if stop != self._length or step != 1:
+            raise ValueError("Only the tail of a MementoStore can be deleted.")
+        self.truncate(start)
+
+    def pop(self) -> ConcreteMemento:
+        stored = self[-1]
+        memento = ConcreteMemento(stored.get_state(), stored.get_date())
+        self.truncate(self._length - 1)
+        return memento
+
+    def find(self, timestamp: Union[float, datetime]) -> int:
+        """
+        Position of the newest snapshot taken at or before `timestamp`.
+        """
+
+        if isinstance(timestamp, datetime):
+            timestamp = timestamp.timestamp()
+
+        position = bisect.bisect_right(_Timestamps(self), timestamp) - 1
+        if position < 0:
+            raise LookupError(f"No snapshot at or before {timestamp}.")
+        return position
+
+    def _release(self, file: Any) -> None:
+        view = self._views.pop(file, None)
+        if isinstance(view, mmap.mmap):
+            view.close()
+
+    def close(self) -> None:
+        for file in (self._log, self._index):
+            self._release(file)
+            file.close()
+
+    def __enter__(self) -> MementoStore:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class _Timestamps:
+    """
+    Read-only sequence view over the index timestamps, for bisect.
+    """
+
+    def __init__(self, store: MementoStore) -> None:
+        self._store = store
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def __getitem__(self, position: int) -> float:
+        return self._store.timestamp(position)
+
+
+class PersistentShadowProtect(ShadowProtect):
+    """
+    A ShadowProtect whose history survives restarts, kept in a MementoStore
+    at `path`.
+    """
+
+    def __init__(self, originator: Backup, path: str) -> None:
+        super().__init__(originator)
+        self._mementos = MementoStore(path)
+        self._cursor = len(self._mementos)
+
+    def restore_to(self, moment: Union[str, float, datetime]) -> None:
+        # The index keeps sub-second timestamps, so search those directly.
+        if isinstance(moment, str):
+            super().restore_to(moment)
+        else:
+            self.restore(self._mementos.find(moment))
+
+    def close(self) -> None:
+        self._mementos.close()
+
+
+class CorruptMementoError(ValueError):
+    pass
+
+
+class PickleCodec:
+    name = "pickle"
+
+    def dumps(self, state: Any) -> bytes:
+        return pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, data: bytes) -> Any:
+        return pickle.loads(data)
+
+
+class JsonCodec:
+    name = "json"
+
+    def dumps(self, state: Any) -> bytes:
+        return json.dumps(state, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class MsgpackCodec:
+    """
+    Needs the optional msgpack package.
+    """
+
+    name = "msgpack"
+
+    def __init__(self) -> None:
+        if msgpack is None:
+            raise ImportError("MsgpackCodec requires the msgpack package.")
+
+    def dumps(self, state: Any) -> bytes:
+        return msgpack.packb(state, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False)
+
+
+COMPRESSIONS = {
+    None: (bytes, bytes),
+    "zlib": (zlib.compress, zlib.decompress),
+    "lzma": (lzma.compress, lzma.decompress),
+}
+
+
+class SerializedMemento(Memento):
+    """
+    A state encoded with a codec, optionally compressed, and protected by a
+    CRC32 of the stored bytes. get_state() raises CorruptMementoError when
+    the bytes no longer match, which makes ShadowProtect skip the snapshot.
+    """
+
+    def __init__(self, payload: bytes, codec: Any, compression: Optional[str],
+                 name: str, date: str) -> None:
+        self.payload = payload
+        self.checksum = zlib.crc32(payload)
+        self._codec = codec
+        self._compression = compression
+        self._name = name
+        self._date = date
+
+    def get_state(self) -> Any:
+        if zlib.crc32(self.payload) != self.checksum:
+            raise CorruptMementoError(f"Checksum mismatch for backup {self._name}.")
+
+        decompress = COMPRESSIONS[self._compression][1]
+        return self._codec.loads(decompress(self.payload))
+
+    def get_name(self) -> str:
+        return self._name
+
+    def get_date(self) -> str:
+        return self._date
+
+
+class PendingMemento(Memento):
+    """
+    A snapshot still being serialized in the background. Name and date are
+    known right away; get_state() waits for the worker.
+    """
+
+    def __init__(self, future: Future, name: str, date: str) -> None:
+        self._future = future
+        self._name = name
+        self._date = date
+
+    def get_state(self) -> Any:
+        return self._future.result().get_state()
+
+    def get_name(self) -> str:
+        return self._name
+
+    def get_date(self) -> str:
+        return self._date
+
+
+class SerializedShadowProtect(ShadowProtect):
+    """
+    A ShadowProtect storing SerializedMementos, with a pluggable codec and
+    compression (None, "zlib" or "lzma").
+
+    With background=True, backup() only captures the originator's memento
+    and leaves encoding and compression to a single worker thread, so
+    snapshots keep their order. Capturing stays on the caller's thread, as
+    it must see the state of that moment; for Backup that is just a
+    reference to an immutable string.
+    """
+
+    def __init__(self, originator: Backup, codec: Any = None,
+                 compression: Optional[str] = "zlib", background: bool = False) -> None:
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression {compression!r}, expected one of {list(COMPRESSIONS)}.")
+
+        super().__init__(originator)
+        self._codec = codec if codec is not None else PickleCodec()
+        self._compression = compression
+        self._executor = ThreadPoolExecutor(max_workers=1) if background else None
+
+    def _serialize(self, memento: Memento) -> SerializedMemento:
+        compress = COMPRESSIONS[self._compression][0]
+        payload = compress(self._codec.dumps(memento.get_state()))
+        return SerializedMemento(payload, self._codec, self._compression,
+                                 memento.get_name(), memento.get_date())
+
+    def _capture(self) -> Memento:
+        memento = self._originator.save()
+        if self._executor is None:
+            return self._serialize(memento)
+
+        future = self._executor.submit(self._serialize, memento)
+        return PendingMemento(future, memento.get_name(), memento.get_date())
+
+    def close(self) -> None:
+        """
+        Wait for pending snapshots and stop the worker.
+        """
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
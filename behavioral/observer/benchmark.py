@@ -0,0 +1,67 @@
+"""
+Creates and destroys ServiceManager subjects, each with a couple of attached
+services, and samples the resident set size along the way. With per-instance
+weak registries the RSS stays flat; the class-level list the subject used to
+keep grows with every cycle (pass --legacy to see it).
+
+    python benchmark.py [cycles] [--legacy]
+"""
+
+from contextlib import redirect_stdout
+import os
+import resource
+import sys
+
+from observer import *
+
+
+class LegacyServiceManager(ServiceManager):
+    _services = []
+
+    def attach(self, service: Service, topic: Optional[str] = None,
+               when: Optional[Callable[[int], bool]] = None) -> None:
+        self._services.append(service)
+
+    def notify(self, topic: Optional[str] = None) -> None:
+        # Walking the ever-growing shared list would make the run quadratic;
+        # only the memory it retains matters here.
+        pass
+
+
+def rss_kib() -> int:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        # Peak rather than current RSS, still fine to spot unbounded growth.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def cycle(manager_class: type) -> None:
+    # The subject holds its services weakly; keep them alive until work().
+    subject = manager_class()
+    services = [SystemUpdateService(), SystemTimeService()]
+    for service in services:
+        subject.attach(service)
+    subject.work()
+
+
+def run(manager_class: type, cycles: int, samples: int = 10) -> None:
+    print(f"{manager_class.__name__}: {cycles} create/destroy cycles")
+
+    step = max(cycles // samples, 1)
+    with open(os.devnull, "w") as devnull:
+        for done in range(0, cycles, step):
+            with redirect_stdout(devnull):
+                for _ in range(min(step, cycles - done)):
+                    cycle(manager_class)
+            print(f"  {done + step:>9} cycles  rss {rss_kib():>8} KiB")
+
+
+if __name__ == "__main__":
+    arguments = [argument for argument in sys.argv[1:] if argument != "--legacy"]
+    cycles = int(arguments[0]) if arguments else 1_000_000
+
+    run(ServiceManager, cycles)
+    if "--legacy" in sys.argv:
+        run(LegacyServiceManager, cycles)
@@ -1,8 +1,17 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import contextmanager
+from itertools import count
 from random import randrange
-from typing import List
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+import threading
 import time
+import weakref
+
+
+# Default for ServiceManager.detach(): drop the service from all its topics.
+ALL_TOPICS = object()
 
 
 class Subject(ABC):
@@ -29,32 +38,475 @@ class ServiceManager(Subject):
     """
 
     _state: int = None
-    _services: List[Service] = []
+    _changes: Tuple[int, ...] = ()
+    # Resolved subscribers kept per topic; the oldest state is evicted past this.
+    dispatch_cache_size: int = 64
 
     """
-    List of subscribers. In real life, the list of subscribers can be stored
-    more comprehensively (categorized by event type, etc.).
+    Subscribers are indexed by topic, and each one may come with a predicate
+    on the state. Every bucket is an insertion-ordered dict, so attach() and
+    detach() are O(1), and the services interested in a (topic, state) pair
+    are resolved once and cached until the subscriptions of that topic
+    change; only a change to the catch-all (None) subscribers drops the
+    entries of every topic. Each topic caches at most dispatch_cache_size
+    states. Predicates must therefore depend on the state only.
+
+    The registry belongs to the instance and holds services through weak
+    references: a service that is garbage collected is dropped from every
+    topic without an explicit detach(). A `when` predicate that is a bound
+    method of the service itself would keep it alive, so leave it to
+    interested_in() instead.
+
+    With a `delivery`, notify() hands each update to it instead of calling
+    the services on the caller's thread; see ThreadedDelivery.
+
+    Inside coalescing(), work() only records state changes and subscribers
+    get a single notification per burst, see StateCoalescer.
     """
 
-    def attach(self, service: Service) -> None:
+    def __init__(self, delivery: Optional[ThreadedDelivery] = None) -> None:
+        self._delivery = delivery
+        self._coalescer: Optional[StateCoalescer] = None
+        self._topics: Dict[Optional[str], Dict[weakref.ref, Subscription]] = {}
+        self._registrations: Dict[weakref.ref, Registration] = {}
+        self._dispatch: Dict[Optional[str], Dict[int, Tuple[weakref.ref, ...]]] = {}
+        self._sequence = count()
+
+    def attach(self, service: Service, topic: Optional[str] = None,
+               when: Optional[Callable[[int], bool]] = None) -> None:
+        """
+        Subscribe a service to a topic, or to every notification when topic is
+        None. `when` defaults to the service's own interested_in().
+        """
+
         print("System: Starting service 🔆")
-        self._services.append(service)
+        registration = self._registrations.get(weakref.ref(service))
+        if registration is None:
+            registration = Registration(self._track(service), set())
+            self._registrations[registration.ref] = registration
 
-    def detach(self, service: Service) -> None:
-        self._services.remove(service)
+        if topic not in registration.topics:
+            subscriptions = self._topics.setdefault(topic, {})
+            subscriptions[registration.ref] = Subscription(next(self._sequence), when)
+            registration.topics.add(topic)
+            self._invalidate((topic,))
 
-    
-    def notify(self) -> None:
+    def _track(self, service: Service) -> weakref.ref:
+        subject = weakref.ref(self)
+
+        def collected(ref: weakref.ref) -> None:
+            manager = subject()
+            if manager is not None:
+                manager._forget(ref, tuple(manager._registrations[ref].topics))
+
+        return weakref.ref(service, collected)
+
+    def _forget(self, ref: weakref.ref, topics: Iterable[Optional[str]]) -> None:
+        registration = self._registrations[ref]
+
+        for name in topics:
+            subscriptions = self._topics[name]
+            del subscriptions[ref]
+            if not subscriptions:
+                del self._topics[name]
+            registration.topics.discard(name)
+        if not registration.topics:
+            del self._registrations[ref]
+
+        self._invalidate(topics)
+
+    def _invalidate(self, topics: Iterable[Optional[str]]) -> None:
+        for name in topics:
+            if name is None:
+                # Catch-all subscribers take part in every topic's dispatch.
+                self._dispatch.clear()
+                return
+            self._dispatch.pop(name, None)
+
+    def detach(self, service: Service, topic: Any = ALL_TOPICS) -> None:
+        registration = self._registrations.get(weakref.ref(service))
+        if registration is None:
+            raise ValueError(f"{service!r} is not attached.")
+
+        if topic is ALL_TOPICS:
+            removed = tuple(registration.topics)
+        elif topic in registration.topics:
+            removed = (topic,)
+        else:
+            raise ValueError(f"{service!r} is not attached to {topic!r}.")
+
+        self._forget(registration.ref, removed)
+
+    def _interested(self, topic: Optional[str], state: int) -> Tuple[weakref.ref, ...]:
+        cached = self._dispatch.setdefault(topic, {})
+        refs = cached.get(state)
+        if refs is None:
+            candidates = list(self._topics.get(None, {}).items())
+            if topic is not None:
+                candidates += self._topics.get(topic, {}).items()
+            candidates.sort(key=lambda item: item[1].sequence)
+
+            # A service subscribed to both the topic and everything is still
+            # notified only once.
+            interested = {}
+            for ref, subscription in candidates:
+                service = ref()
+                if service is not None and subscription.accepts(service, state):
+                    interested[ref] = None
+            refs = tuple(interested)
+            if len(cached) >= self.dispatch_cache_size:
+                del cached[next(iter(cached))]
+            cached[state] = refs
+
+        return refs
+
+    @property
+    def changes(self) -> Tuple[int, ...]:
+        """
+        The states merged into the notification being delivered, oldest
+        first. Empty outside coalesced notifications.
+        """
+
+        return self._changes
+
+    def notify(self, topic: Optional[str] = None) -> None:
         print("System: Notifying services...")
-        for service in self._services:
-            service.update(self)
-    
-    def work(self) -> None:
+        if self._delivery is not None:
+            snapshot = SubjectSnapshot(self, self._state, topic, self._changes)
+
+        for ref in self._interested(topic, self._state):
+            service = ref()
+            if service is None:
+                continue
+            if self._delivery is None:
+                service.update(self)
+            else:
+                self._delivery.submit(service, snapshot)
+
+    def work(self, topic: Optional[str] = None) -> None:
         print("\nSystem: I'm doing something important.")
         self._state = randrange(0, 10)
 
         print(f"System: My state has just changed to: {self._state}")
-        self.notify()
+        if self._coalescer is not None:
+            self._coalescer.record(self._state, topic)
+        else:
+            self.notify(topic)
+
+    @contextmanager
+    def coalescing(self, window: Optional[float] = None,
+                   history: bool = False) -> Iterator[StateCoalescer]:
+        """
+        Merge the notifications of the state changes made inside the block.
+        Without a window they are sent on flush() (call it once per tick) and
+        when the block ends; with one, at most `window` seconds after the
+        first change of a burst.
+        """
+
+        if self._coalescer is not None:
+            raise RuntimeError("ServiceManager is already coalescing.")
+
+        self._coalescer = StateCoalescer(self, window, history)
+        try:
+            yield self._coalescer
+        finally:
+            coalescer, self._coalescer = self._coalescer, None
+            coalescer.flush()
+
+    def flush(self) -> None:
+        if self._coalescer is not None:
+            self._coalescer.flush()
+
+    def _notify_coalesced(self, topic: Optional[str], changes: Tuple[int, ...]) -> None:
+        self._changes = changes
+        try:
+            self.notify(topic)
+        finally:
+            self._changes = ()
+
+
+class StateCoalescer:
+    """
+    Collects the state changes of a ServiceManager and turns every burst into
+    one notification per topic. Services see the subject's final state, and
+    `subject.changes` holds the whole burst when history is on (otherwise
+    only the final state).
+    """
+
+    def __init__(self, subject: ServiceManager, window: Optional[float],
+                 history: bool) -> None:
+        if window is not None and window <= 0:
+            raise ValueError("window must be positive.")
+
+        self._subject = subject
+        self._window = window
+        self._history = history
+        self._lock = threading.Lock()
+        self._flushing = threading.Lock()
+        self._pending: Dict[Optional[str], List[int]] = {}
+        self._timer: Optional[threading.Timer] = None
+        self.merged = 0
+
+    def record(self, state: int, topic: Optional[str]) -> None:
+        with self._lock:
+            states = self._pending.get(topic)
+            if states is None:
+                self._pending[topic] = [state]
+            else:
+                self.merged += 1
+                if self._history:
+                    states.append(state)
+                else:
+                    states[0] = state
+
+            if self._window is not None and self._timer is None:
+                self._timer = threading.Timer(self._window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> None:
+        # The timer thread and the caller may both flush; keep their
+        # notifications from interleaving.
+        with self._flushing:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+
+            for topic, states in pending.items():
+                self._subject._notify_coalesced(topic, tuple(states))
+
+
+class Subscription(NamedTuple):
+    sequence: int
+    when: Optional[Callable[[int], bool]]
+
+    def accepts(self, service: Service, state: int) -> bool:
+        if self.when is None:
+            return service.interested_in(state)
+        return self.when(state)
+
+
+class Registration(NamedTuple):
+    ref: weakref.ref
+    topics: Set[Optional[str]]
+
+
+class SubjectSnapshot:
+    """
+    What services receive on deferred delivery: the state the notification
+    was raised for, read through the same `_state` attribute as the live
+    subject, which stays reachable as `subject`.
+    """
+
+    __slots__ = ("subject", "_state", "topic", "changes")
+
+    def __init__(self, subject: Subject, state: int, topic: Optional[str],
+                 changes: Tuple[int, ...] = ()) -> None:
+        self.subject = subject
+        self._state = state
+        self.topic = topic
+        self.changes = changes
+
+
+class DeliveryStats:
+    """
+    Delivery counters and the lag between notify() and the start of each
+    update(), with percentiles over a bounded window.
+    """
+
+    def __init__(self, window: int = 1024) -> None:
+        self._lock = threading.Lock()
+        self._lags: Deque[float] = deque(maxlen=window)
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+
+    def record_delivery(self, lag: float, failed: bool) -> None:
+        with self._lock:
+            self.delivered += 1
+            self.errors += failed
+            self.lag_total += lag
+            self.lag_max = max(self.lag_max, lag)
+            self._lags.append(lag)
+
+    def record_drop(self) -> None:
+        with self._lock:
+            self.dropped += 1
+
+    def record_coalesce(self) -> None:
+        with self._lock:
+            self.coalesced += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lags = sorted(self._lags)
+
+            def percentile(fraction: float) -> float:
+                return lags[min(int(fraction * len(lags)), len(lags) - 1)] if lags else 0.0
+
+            return {
+                "delivered": self.delivered,
+                "dropped": self.dropped,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+                "lag_mean": self.lag_total / self.delivered if self.delivered else 0.0,
+                "lag_max": self.lag_max,
+                "lag_p50": percentile(0.50),
+                "lag_p99": percentile(0.99),
+            }
+
+
+class DeliveryLane:
+    """
+    One bounded FIFO queue drained by one worker thread. Every service is
+    pinned to a single lane, which is what keeps its updates in order.
+    """
+
+    def __init__(self, delivery: ThreadedDelivery, name: str) -> None:
+        self._delivery = delivery
+        self._queue: Deque[List[Any]] = deque()
+        self._pending: Dict[Service, List[Any]] = {}
+        self._condition = threading.Condition()
+        self._unfinished = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def put(self, service: Service, snapshot: SubjectSnapshot) -> None:
+        delivery = self._delivery
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Delivery has been closed.")
+
+            if delivery.backpressure == "coalesce":
+                pending = self._pending.get(service)
+                if pending is not None:
+                    # Keep the queue position, and with it the per-service
+                    # order, but deliver the newest state.
+                    pending[1] = snapshot
+                    delivery.stats.record_coalesce()
+                    return
+
+            if len(self._queue) >= delivery.maxsize:
+                if delivery.backpressure == "drop-oldest":
+                    self._discard(self._queue.popleft())
+                    delivery.stats.record_drop()
+                else:
+                    while len(self._queue) >= delivery.maxsize and not self._closed:
+                        self._condition.wait()
+
+            item = [service, snapshot, time.perf_counter()]
+            self._queue.append(item)
+            if delivery.backpressure == "coalesce":
+                self._pending[service] = item
+            self._unfinished += 1
+            self._condition.notify_all()
+
+    def _discard(self, item: List[Any]) -> None:
+        if self._pending.get(item[0]) is item:
+            del self._pending[item[0]]
+        self._unfinished -= 1
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+
+                item = self._queue.popleft()
+                if self._pending.get(item[0]) is item:
+                    del self._pending[item[0]]
+                self._condition.notify_all()
+
+            service, snapshot, enqueued = item
+            lag = time.perf_counter() - enqueued
+            try:
+                service.update(snapshot)
+                failed = False
+            except Exception:
+                failed = True
+            self._delivery.stats.record_delivery(lag, failed)
+
+            with self._condition:
+                self._unfinished -= 1
+                self._condition.notify_all()
+
+    def join(self) -> None:
+        with self._condition:
+            while self._unfinished:
+                self._condition.wait()
+
+    def close(self, wait: bool) -> None:
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if wait:
+            self._thread.join()
+
+
+class ThreadedDelivery:
+    """
+    Delivers ServiceManager notifications from a pool of worker threads, so
+    a slow service no longer stalls work() or the other subscribers.
+
+    Each worker drains its own bounded queue, and a service always goes to
+    the same worker, so it sees its updates in notification order. When a
+    queue is full, `backpressure` decides what happens:
+
+    * "block": notify() waits for room,
+    * "drop-oldest": the oldest queued update is discarded,
+    * "coalesce": an update still queued for the same service is replaced by
+      the newer one (blocking if the queue is full anyway).
+
+    Services receive a SubjectSnapshot instead of the subject itself.
+    """
+
+    BACKPRESSURE = ("block", "drop-oldest", "coalesce")
+
+    def __init__(self, workers: int = 4, maxsize: int = 1024,
+                 backpressure: str = "block") -> None:
+        if backpressure not in self.BACKPRESSURE:
+            raise ValueError(f"Unknown backpressure {backpressure!r}, expected one of {self.BACKPRESSURE}.")
+        if workers < 1 or maxsize < 1:
+            raise ValueError("workers and maxsize must be at least 1.")
+
+        self.maxsize = maxsize
+        self.backpressure = backpressure
+        self.stats = DeliveryStats()
+        self._lanes = [DeliveryLane(self, f"ServiceDelivery-{index}") for index in range(workers)]
+
+    def submit(self, service: Service, snapshot: SubjectSnapshot) -> None:
+        self._lanes[hash(service) % len(self._lanes)].put(service, snapshot)
+
+    def join(self) -> None:
+        """
+        Wait until every queued update has been delivered.
+        """
+
+        for lane in self._lanes:
+            lane.join()
+
+    def close(self, wait: bool = True) -> None:
+        """
+        Stop accepting updates. Workers finish what is already queued.
+        """
+
+        for lane in self._lanes:
+            lane.close(wait)
+
+    def __enter__(self) -> ThreadedDelivery:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
 
 
 class Service(ABC):
@@ -65,14 +517,27 @@ class Service(ABC):
         """
         pass
 
+    def interested_in(self, state: int) -> bool:
+        """
+        Whether the service wants to hear about this state at all. Subjects
+        use it to skip services that would ignore the notification anyway.
+        """
+        return True
+
 
 class SystemUpdateService(Service):
+    def interested_in(self, state: int) -> bool:
+        return state < 3
+
     def update(self, subject: Subject) -> None:
         if subject._state < 3:
             print("System Update Service: New Update Available.")
 
 
 class SystemTimeService(Service):
+    def interested_in(self, state: int) -> bool:
+        return state >= 2 or state == 0
+
     def update(self, subject: Subject) -> None:
         if subject._state >= 2 or subject._state == 0:
             print(f"System Time Service: {time.time()}. ⌚")
\ No newline at end of file
@@ -0,0 +1,104 @@
+"""
+Startup cost of registering OS strategies lazily ("module:attribute"
+strings) against importing them up front, and boot throughput of a plain
+BIOS loop against boot_many() for deterministic and for slow,
+non-deterministic strategies. Last, AutoTuningBIOS picking between a
+slow and a fast strategy whose speeds swap halfway through the run.
+
+    python benchmark.py [instances]
+"""
+
+import subprocess
+import sys
+import time
+
+from strategy import *
+
+
+# Stand-ins for OS strategies living in heavy modules.
+HEAVY_TARGETS = {
+    "asyncio": "asyncio:AbstractEventLoop",
+    "decimal": "decimal:Decimal",
+    "email": "email.mime.multipart:MIMEMultipart",
+    "http": "http.server:HTTPServer",
+    "xml": "xml.dom.minidom:Document",
+}
+
+
+class SlowOS(OS):
+    def boot(self) -> str:
+        time.sleep(0.002)
+        return f"SlowOS {time.time()}"
+
+
+class PhasedOS(OS):
+    """
+    Sleeps for `delays[phase]`; the phase is flipped by the benchmark.
+    """
+
+    phase = 0
+
+    def __init__(self, *delays: float) -> None:
+        self._delays = delays
+
+    def boot(self) -> str:
+        time.sleep(self._delays[PhasedOS.phase])
+        return "PhasedOS"
+
+
+def startup(lazy: bool) -> float:
+    registrations = "\n".join(
+        f"registry.register({name!r}, {target!r})" if lazy else
+        f"from {target.split(':')[0]} import {target.split(':')[1]}\n"
+        f"registry.register({name!r}, {target.split(':')[1]})"
+        for name, target in HEAVY_TARGETS.items())
+    code = f"from strategy import OSRegistry\nregistry = OSRegistry()\n{registrations}\n"
+
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], check=True)
+    return time.perf_counter() - started
+
+
+def timed(label: str, function: Callable[[], object], count: int) -> None:
+    started = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<40} {elapsed * 1e3:10.1f} ms  {count / elapsed:12.0f} boots/s")
+
+
+if __name__ == "__main__":
+    instances = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    print(f"interpreter startup with {len(HEAVY_TARGETS)} strategies registered")
+    print(f"{'eager imports':<40} {startup(lazy=False) * 1e3:10.1f} ms")
+    print(f"{'lazy registry':<40} {startup(lazy=True) * 1e3:10.1f} ms\n")
+
+    configs = ["ubuntu", "arch"] * (instances // 2)
+    timed(f"{len(configs)} deterministic, BIOS loop",
+          lambda: [BIOS.from_registry(name).boot() for name in configs], len(configs))
+    timed(f"{len(configs)} deterministic, boot_many",
+          lambda: boot_many(configs), len(configs))
+
+    registry = OSRegistry()
+    registry.register("slow", "benchmark:SlowOS")
+    slow = ["slow"] * 500
+    timed(f"{len(slow)} slow, BIOS loop",
+          lambda: [BIOS.from_registry(name, registry).boot() for name in slow], len(slow))
+    timed(f"{len(slow)} slow, boot_many",
+          lambda: boot_many(slow, registry), len(slow))
+
+    print()
+    boots = 2_000
+    for label, bios in (
+            ("fixed strategy", BIOS(PhasedOS(0.0002, 0.001))),
+            ("auto-tuned epsilon-greedy", AutoTuningBIOS(
+                [PhasedOS(0.0002, 0.001), PhasedOS(0.001, 0.0002)], reevaluate_every=200, seed=1)),
+            ("auto-tuned ucb1", AutoTuningBIOS(
+                [PhasedOS(0.0002, 0.001), PhasedOS(0.001, 0.0002)], policy="ucb1",
+                reevaluate_every=200, seed=1))):
+        def run() -> None:
+            for index in range(boots):
+                PhasedOS.phase = index * 2 // boots
+                bios.boot()
+
+        timed(f"{boots} boots, {label}", run, boots)
@@ -1,6 +1,15 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import List
+from importlib import import_module
+from itertools import repeat
+from math import log, sqrt
+from os import cpu_count
+from random import Random
+from typing import Any, Callable, Dict, Generic, Iterable, List, Optional, TypeVar, Union
+import time
+
+
+T = TypeVar("T")
 
 
 class BIOS():
@@ -8,6 +17,11 @@ class BIOS():
         self._os = os
 
 
+    @classmethod
+    def from_registry(cls, name: str, registry: Optional[OSRegistry] = None) -> BIOS:
+        return cls((registry or os_registry).create(name))
+
+
     @property
     def os(self) -> OS:
         return self._os
@@ -18,24 +32,273 @@ class BIOS():
         self._os = os
 
 
-    def boot_loader(self) -> None:
+    def boot(self) -> str:
+        return self._os.boot()
+
+
+    def boot_loader(self, interactive: bool = True) -> None:
         print("GRUB: Press Enter to boot the selected OS.")
-        input()
-        result = self._os.boot()
+        if interactive:
+            input()
+        result = self.boot()
         print(f'{result} Starting... Please wait')
 
 
 class OS(ABC):
+    """
+    Strategies whose boot() always returns the same result can set
+    deterministic, so that registries only boot them once.
+    """
+
+    deterministic: bool = False
+
     @abstractmethod
     def boot(self, data: str):
         pass
 
 
 class Ubuntu(OS):
+    deterministic = True
+
     def boot(self) -> str:
         return 'Ubuntu 8.04, kernel'
 
 
 class Arch(OS):
+    deterministic = True
+
+    def boot(self) -> str:
+        return 'ArchLinux 16.0'
+
+
+class OSRegistry:
+    """
+    OS strategies selected by name. A strategy is registered as an OS class
+    or factory, or as a "module:attribute" string that is only imported the
+    first time the strategy is selected; register_entry_points() adds the
+    installed entry points of a group the same way.
+
+    Results of deterministic strategies are memoized per name.
+    """
+
+    def __init__(self) -> None:
+        self._targets: Dict[str, Union[str, Callable[[], OS]]] = {}
+        self._factories: Dict[str, Callable[[], OS]] = {}
+        self._results: Dict[str, str] = {}
+
+    def register(self, name: str, target: Union[str, Callable[[], OS]]) -> None:
+        self._targets[name] = target
+        self._factories.pop(name, None)
+        self._results.pop(name, None)
+
+    def register_entry_points(self, group: str = "tmps.os") -> None:
+        # Imported here to keep them off the startup path.
+        from importlib.metadata import entry_points
+
+        for entry_point in entry_points(group=group):
+            self.register(entry_point.name, entry_point.value)
+
+    def names(self) -> List[str]:
+        return list(self._targets)
+
+    def _factory(self, name: str) -> Callable[[], OS]:
+        factory = self._factories.get(name)
+        if factory is None:
+            try:
+                target = self._targets[name]
+            except KeyError:
+                raise LookupError(f"No OS registered as {name!r}.") from None
+
+            if isinstance(target, str):
+                module, _, attribute = target.partition(":")
+                factory = import_module(module)
+                for part in attribute.split("."):
+                    factory = getattr(factory, part)
+            else:
+                factory = target
+
+            self._factories[name] = factory
+
+        return factory
+
+    def create(self, name: str) -> OS:
+        return self._factory(name)()
+
+    def boot(self, name: str) -> str:
+        result = self._results.get(name)
+        if result is None:
+            os = self.create(name)
+            result = os.boot()
+            if os.deterministic:
+                self._results[name] = result
+        return result
+
+    def __getstate__(self) -> Dict[str, Dict]:
+        # Loaded factories are re-imported on the other side.
+        return {"_targets": self._targets, "_factories": {}, "_results": self._results}
+
+
+os_registry = OSRegistry()
+os_registry.register("ubuntu", Ubuntu)
+os_registry.register("arch", Arch)
+
+
+def boot_many(configs: Iterable[str], registry: Optional[OSRegistry] = None,
+              processes: Optional[int] = None) -> List[str]:
+    """
+    Boot one instance per config, an OS name, without any prompt, and return
+    the results in order. Deterministic strategies are booted once and
+    memoized; every other config is booted in a process pool, so registered
+    targets must be picklable (classes, module-level functions, strings).
+    """
+
+    registry = registry or os_registry
+    configs = list(configs)
+    results: List[Optional[str]] = [None] * len(configs)
+    remote = []
+
+    for index, name in enumerate(configs):
+        if getattr(registry._factory(name), "deterministic", False):
+            results[index] = registry.boot(name)
+        else:
+            remote.append(index)
+
+    if remote:
+        from concurrent.futures import ProcessPoolExecutor
+
+        workers = processes or cpu_count() or 1
+        with ProcessPoolExecutor(workers) as pool:
+            booted = pool.map(_boot_in_worker, repeat(registry), (configs[index] for index in remote),
+                              chunksize=max(1, len(remote) // (4 * workers)))
+            for index, result in zip(remote, booted):
+                results[index] = result
+
+    return results
+
+
+def _boot_in_worker(registry: OSRegistry, name: str) -> str:
+    return registry.create(name).boot()
+
+
+class TimingStats:
+    """
+    Timings of one candidate. The mean is an exponentially weighted moving
+    average, so it follows the current workload rather than all history.
+    """
+
+    def __init__(self, name: str, smoothing: float) -> None:
+        self.name = name
+        self.calls = 0
+        self.window_calls = 0
+        self.total_time = 0.0
+        self.mean: Optional[float] = None
+        self._smoothing = smoothing
+
+    def record(self, elapsed: float) -> None:
+        self.calls += 1
+        self.window_calls += 1
+        self.total_time += elapsed
+        if self.mean is None:
+            self.mean = elapsed
+        else:
+            self.mean += self._smoothing * (elapsed - self.mean)
+
+
+class StrategyTuner(Generic[T]):
+    """
+    Chooses among interchangeable strategies by timing live calls and
+    converging on the fastest one.
+
+    "epsilon-greedy" runs the fastest candidate so far and a random one with
+    probability epsilon; "ucb1" trades speed against how rarely a candidate
+    was tried. Every `reevaluate_every` calls each candidate is run again at
+    least once, so a change in the workload or the host is noticed.
+    """
+
+    POLICIES = ("epsilon-greedy", "ucb1")
+
+    def __init__(self, candidates: Iterable[T], policy: str = "epsilon-greedy",
+                 epsilon: float = 0.05, reevaluate_every: Optional[int] = 1000,
+                 smoothing: float = 0.1, seed: Optional[int] = None) -> None:
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown policy {policy!r}, expected one of {self.POLICIES}.")
+
+        self._candidates = list(candidates)
+        if not self._candidates:
+            raise ValueError("StrategyTuner needs at least one candidate.")
+
+        self._policy = policy
+        self._epsilon = epsilon
+        self._reevaluate_every = reevaluate_every
+        self._random = Random(seed)
+        self._calls = 0
+        self._stats = [TimingStats(type(candidate).__name__, smoothing)
+                       for candidate in self._candidates]
+
+    @property
+    def best(self) -> T:
+        measured = [index for index, stats in enumerate(self._stats) if stats.mean is not None]
+        if not measured:
+            return self._candidates[0]
+        return self._candidates[min(measured, key=lambda index: self._stats[index].mean)]
+
+    def _select(self) -> int:
+        for index, stats in enumerate(self._stats):
+            if not stats.window_calls:
+                return index
+
+        if self._policy == "epsilon-greedy":
+            if self._random.random() < self._epsilon:
+                return self._random.randrange(len(self._candidates))
+            return min(range(len(self._stats)), key=lambda index: self._stats[index].mean)
+
+        # UCB1 on a reward in (0, 1]: the fastest mean over the candidate's.
+        fastest = min(stats.mean for stats in self._stats) or 1e-12
+        total = sum(stats.window_calls for stats in self._stats)
+        return max(range(len(self._stats)), key=lambda index: (
+            fastest / max(self._stats[index].mean, 1e-12)
+            + sqrt(2 * log(total) / self._stats[index].window_calls)))
+
+    def run(self, call: Callable[[T], Any]) -> Any:
+        """
+        Run `call` with the selected candidate and time it.
+        """
+
+        if self._reevaluate_every and self._calls and self._calls % self._reevaluate_every == 0:
+            for stats in self._stats:
+                stats.window_calls = 0
+        self._calls += 1
+
+        index = self._select()
+        started = time.perf_counter()
+        result = call(self._candidates[index])
+        self._stats[index].record(time.perf_counter() - started)
+        return result
+
+    def stats(self) -> List[Dict[str, Any]]:
+        best = self.best
+        return [{
+            "name": stats.name,
+            "calls": stats.calls,
+            "mean": stats.mean,
+            "total_time": stats.total_time,
+            "best": candidate is best,
+        } for candidate, stats in zip(self._candidates, self._stats)]
+
+
+class AutoTuningBIOS(BIOS):
+    """
+    A BIOS that swaps its OS through the os setter on every boot, letting a
+    StrategyTuner settle on the fastest of the candidates.
+    """
+
+    def __init__(self, candidates: Iterable[OS], **options: Any) -> None:
+        self.tuner: StrategyTuner[OS] = StrategyTuner(candidates, **options)
+        super().__init__(self.tuner.best)
+
+    def _boot_with(self, os: OS) -> str:
+        self.os = os
+        return os.boot()
+
     def boot(self) -> str:
-        return 'ArchLinux 16.0'
\ No newline at end of file
+        return self.tuner.run(self._boot_with)
@@ -1,5 +1,7 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
+from itertools import repeat
+from typing import Callable, Dict, List, Set
 
 
 class AbstractFactory(ABC):
@@ -11,6 +13,14 @@ class AbstractFactory(ABC):
     def create_mercedes(self) -> Mercedes:
         pass
 
+    def create_many_bmw(self, n: int) -> List[BMW]:
+        create_bmw = self.create_bmw
+        return [create_bmw() for _ in range(n)]
+
+    def create_many_mercedes(self, n: int) -> List[Mercedes]:
+        create_mercedes = self.create_mercedes
+        return [create_mercedes() for _ in range(n)]
+
 
 class SedanFactory(AbstractFactory):
     def create_bmw(self) -> BMW:
@@ -28,23 +38,118 @@ class SuvFactory(AbstractFactory):
         return SuvMercedes()
 
 
+class CachingFactory(AbstractFactory):
+    """
+    Wraps a factory so that products are not built on every call.
+
+    Stateless products (`stateless = True`) are created once and shared as
+    flyweights. Stateful ones are recycled: hand them back with release()
+    and the next create_* call reuses them, calling their reset() if any.
+    """
+
+    def __init__(self, factory: AbstractFactory, pool_size: int = 64) -> None:
+        self._factory = factory
+        self._pool_size = pool_size
+        self._pools: Dict[str, List[object]] = {}
+        self._kinds: Dict[type, str] = {}
+        # ids of the products sitting in the pools, to catch double releases.
+        self._pooled: Set[int] = set()
+
+    def _first(self, kind: str, create: Callable[[], object]):
+        """
+        Build the first product of a kind and, depending on whether it is
+        stateless, replace create_<kind> on this instance with a lookup of
+        the shared product or with a pool pop.
+        """
+
+        product = create()
+        if product.stateless:
+            setattr(self, f"create_{kind}", repeat(product).__next__)
+            return product
+
+        pool = self._pools.setdefault(kind, [])
+        self._kinds[type(product)] = kind
+
+        def acquire():
+            if pool:
+                product = pool.pop()
+                self._pooled.discard(id(product))
+                return product
+            return create()
+
+        setattr(self, f"create_{kind}", acquire)
+        return product
+
+    def create_bmw(self) -> BMW:
+        return self._first("bmw", self._factory.create_bmw)
+
+    def create_mercedes(self) -> Mercedes:
+        return self._first("mercedes", self._factory.create_mercedes)
+
+    def create_many_bmw(self, n: int) -> List[BMW]:
+        return self._many(n, self.create_bmw)
+
+    def create_many_mercedes(self, n: int) -> List[Mercedes]:
+        return self._many(n, self.create_mercedes)
+
+    def _many(self, n: int, create: Callable[[], object]) -> List[object]:
+        if n <= 0:
+            return []
+        first = create()
+        if first.stateless:
+            return [first] * n
+        return [first] + [create() for _ in range(n - 1)]
+
+    def release(self, product: object) -> None:
+        """
+        Return a stateful product to its pool. Shared products are ignored.
+        """
+
+        kind = self._kinds.get(type(product))
+        if kind is None:
+            return
+
+        if id(product) in self._pooled:
+            raise ValueError(f"{type(product).__name__} was already released.")
+
+        pool = self._pools[kind]
+        if len(pool) < self._pool_size:
+            getattr(product, "reset", lambda: None)()
+            pool.append(product)
+            self._pooled.add(id(product))
+
+
 class BMW(ABC):
+    __slots__ = ()
+    # Concrete products opt in to being shared as flyweights.
+    stateless = False
+
     @abstractmethod
     def confort_mode(self) -> str:
         pass
 
 
 class SedanBMW(BMW):
+    __slots__ = ()
+    stateless = True
+
     def confort_mode(self) -> str:
         return "Sedan BMW Confort Mode ON"
 
 
 class SuvBMW(BMW):
+    __slots__ = ()
+    stateless = True
+
     def confort_mode(self) -> str:
         return "SUV BMW Confort Mode ON"
 
 
 class Mercedes(ABC):
+    __slots__ = ()
+    # Concrete products opt in to being shared as flyweights.
+    stateless = False
+
     @abstractmethod
     def confort_mode(self) -> None:
         pass
@@ -55,6 +160,9 @@ class Mercedes(ABC):
 
 
 class SedanMercedes(Mercedes):
+    __slots__ = ()
+    stateless = True
+
     def confort_mode(self) -> str:
         return "Sedan Mercedes Mode ON"
 
@@ -64,6 +172,9 @@ class SedanMercedes(Mercedes):
 
 
 class SuvMercedes(Mercedes):
+    __slots__ = ()
+    stateless = True
+
     def confort_mode(self) -> str:
         return "SUV Mercedes Confort Mode ON"
 
@@ -72,6 +183,20 @@ class SuvMercedes(Mercedes):
         return f"SUV Mercedes Confort+{result}"
 
 
+FACTORIES: Dict[str, Callable[[], AbstractFactory]] = {
+    "sedan": SedanFactory,
+    "suv": SuvFactory,
+}
+
+
+def get_factory(name: str, cached: bool = False) -> AbstractFactory:
+    try:
+        factory = FACTORIES[name]()
+    except KeyError:
+        raise LookupError(f"No factory registered as {name!r}.") from None
+    return CachingFactory(factory) if cached else factory
+
+
 def client_code(factory: AbstractFactory) -> None:
     BMW = factory.create_bmw()
     Mercedes = factory.create_mercedes()
@@ -88,3 +213,8 @@ if __name__ == "__main__":
 
     print("Client: Testing the same client code with the second factory type:")
     client_code(SuvFactory())
+
+    print("\n")
+
+    print("Client: Testing the same client code with a cached factory from the registry:")
+    client_code(get_factory("sedan", cached=True))
@@ -0,0 +1,70 @@
+"""
+Creation throughput and allocations of the plain factories against
+CachingFactory: shared flyweights for the stateless sedan products, and a
+recycled pool for a stateful product that is released after use. Products
+are created and released in batches of a thousand held at once; the
+memory column is what one such batch allocates.
+
+    python benchmark.py [creations]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from AbstractFactoryClient import *
+
+
+class RentalBMW(SedanBMW):
+    """
+    A stateful product: every car keeps its own odometer.
+    """
+
+    stateless = False
+
+    def __init__(self) -> None:
+        self.mileage = 0
+
+    def reset(self) -> None:
+        self.mileage = 0
+
+
+class RentalFactory(SedanFactory):
+    def create_bmw(self) -> BMW:
+        return RentalBMW()
+
+
+def measure(label: str, factory: AbstractFactory, creations: int, held: int = 1_000) -> None:
+    release = getattr(factory, "release", lambda product: None)
+
+    # Warm up, so that caches and pools are populated.
+    for bmw in [factory.create_bmw() for _ in range(held)]:
+        release(bmw)
+
+    started = time.perf_counter()
+    for _ in range(creations // held):
+        bmws = [factory.create_bmw() for _ in range(held)]
+        mercedes = [factory.create_mercedes() for _ in range(held)]
+        for bmw in bmws:
+            release(bmw)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    bmws = [factory.create_bmw() for _ in range(held)]
+    mercedes = [factory.create_mercedes() for _ in range(held)]
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    products = len({id(product) for product in bmws + mercedes})
+
+    print(f"{label:<20} {creations * 2 / elapsed:12.0f} products/s "
+          f"{products:8} distinct of {held * 2} held {allocated / 1024:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    creations = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+
+    print(f"{creations} BMW + Mercedes pairs per factory\n")
+    measure("sedan", get_factory("sedan"), creations)
+    measure("sedan, cached", get_factory("sedan", cached=True), creations)
+    measure("rental", RentalFactory(), creations)
+    measure("rental, cached", CachingFactory(RentalFactory(), pool_size=1_000), creations)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import Any
+from itertools import repeat
+from typing import Any, Dict, List, Tuple
 
 class Builder(ABC):
     @property
@@ -43,6 +44,8 @@ class BMWBuilder(Builder):
         self._car.add("Engine")
 
 class BMW():
+    __slots__ = ("parts",)
+
     def __init__(self) -> None:
         self.parts = []
 
@@ -52,9 +55,97 @@ class BMW():
     def list_parts(self) -> None:
         print(f"Car parts: {', '.join(self.parts)}", end="")
 
+class FrozenBMW():
+    """
+    An immutable BMW. Cars built from the same template share its parts
+    tuple instead of each holding a list of their own.
+    """
+
+    __slots__ = ("parts",)
+
+    def __init__(self, parts: Tuple[str, ...] = ()) -> None:
+        self.parts = parts
+
+    def list_parts(self) -> None:
+        print(f"Car parts: {', '.join(self.parts)}", end="")
+
+class CarTemplate():
+    """
+    A recorded sequence of building steps. Cars are stamped out of it
+    without replaying the steps.
+    """
+
+    __slots__ = ("parts",)
+
+    def __init__(self, parts: Tuple[str, ...]) -> None:
+        self.parts = parts
+
+    @property
+    def car(self) -> FrozenBMW:
+        return FrozenBMW(self.parts)
+
+    def build(self, n: int) -> List[FrozenBMW]:
+        return list(map(FrozenBMW, repeat(self.parts, n)))
+
+class TemplateRecorder(Builder):
+    """
+    A builder that records the steps a Director takes into a CarTemplate.
+    """
+
+    def __init__(self) -> None:
+        self._parts: List[str] = []
+
+    def template(self) -> CarTemplate:
+        template = CarTemplate(tuple(self._parts))
+        self._parts = []
+        return template
+
+    @property
+    def car(self) -> FrozenBMW:
+        return self.template().car
+
+    def produce_wheels(self) -> None:
+        self._parts.append("Wheels")
+
+    def produce_brakes(self) -> None:
+        self._parts.append("Brakes")
+
+    def produce_engine(self) -> None:
+        self._parts.append("Engine")
+
+class FluentBMWBuilder():
+    """
+    An immutable builder: every step returns a new builder, so partial
+    configurations can be kept and extended independently.
+
+        FluentBMWBuilder().engine().wheels().template().build(1000)
+    """
+
+    __slots__ = ("_parts",)
+
+    def __init__(self, parts: Tuple[str, ...] = ()) -> None:
+        self._parts = parts
+
+    def wheels(self) -> FluentBMWBuilder:
+        return FluentBMWBuilder(self._parts + ("Wheels",))
+
+    def brakes(self) -> FluentBMWBuilder:
+        return FluentBMWBuilder(self._parts + ("Brakes",))
+
+    def engine(self) -> FluentBMWBuilder:
+        return FluentBMWBuilder(self._parts + ("Engine",))
+
+    def template(self) -> CarTemplate:
+        return CarTemplate(self._parts)
+
+    @property
+    def car(self) -> FrozenBMW:
+        return FrozenBMW(self._parts)
+
 class Director:
     def __init__(self) -> None:
         self._builder = None
+        self._templates: Dict[str, CarTemplate] = {}
 
     @property
     def builder(self) -> Builder:
@@ -72,6 +163,22 @@ class Director:
         self.builder.produce_wheels()
         self.builder.produce_brakes()
 
+    def record(self, recipe: str) -> CarTemplate:
+        """
+        Run a recipe such as "build_full_car" once against a recorder and
+        return it as a template. Templates are cached per recipe.
+        """
+
+        template = self._templates.get(recipe)
+        if template is None:
+            builder, self._builder = self._builder, TemplateRecorder()
+            try:
+                getattr(self, recipe)()
+                template = self._templates[recipe] = self._builder.template()
+            finally:
+                self._builder = builder
+        return template
+
 if __name__ == '__main__':
     director = Director()
     builder = BMWBuilder()
@@ -86,3 +193,10 @@ if __name__ == '__main__':
     print('Standard Full Car')
     director.build_full_car()
     builder.car.list_parts()
+
+    print("\n")
+
+    print('Full Cars From A Recorded Template')
+    for car in director.record("build_full_car").build(2):
+        car.list_parts()
+        print()
@@ -0,0 +1,56 @@
+"""
+Cars per second and memory per car when every car replays the Director's
+full recipe through BMWBuilder, against stamping cars out of a template
+recorded once, built one by one or in a batch.
+
+    python benchmark.py [cars]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from Builder import *
+
+
+def classic(cars: int) -> List[BMW]:
+    director = Director()
+    builder = BMWBuilder()
+    director.builder = builder
+    result = []
+    for _ in range(cars):
+        director.build_full_car()
+        result.append(builder.car)
+    return result
+
+
+def template_loop(cars: int) -> List[FrozenBMW]:
+    template = Director().record("build_full_car")
+    return [template.car for _ in range(cars)]
+
+
+def template_batch(cars: int) -> List[FrozenBMW]:
+    return Director().record("build_full_car").build(cars)
+
+
+def measure(label: str, build, cars: int) -> None:
+    started = time.perf_counter()
+    build(cars)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    result = build(cars)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+
+    print(f"{label:<24} {cars / elapsed:12.0f} cars/s {memory / cars:8.1f} B/car")
+
+
+if __name__ == "__main__":
+    cars = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+
+    print(f"{cars} full cars\n")
+    measure("director + BMWBuilder", classic, cars)
+    measure("template, one by one", template_loop, cars)
+    measure("template, build(n)", template_batch, cars)
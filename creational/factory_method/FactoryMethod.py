@@ -1,7 +1,18 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
+from itertools import repeat, starmap
+from typing import Iterator, List, Optional
 
 class Creator(ABC):
+    """
+    Creators that always build the same class can name it in `product`;
+    create_many() then instantiates it directly instead of going through
+    create_car() once per car. A subclass that overrides create_car()
+    without redeclaring `product` goes through create_car() again.
+    """
+
+    product: Optional[type] = None
+
     @abstractmethod
     def create_car(self):
         pass
@@ -13,32 +24,68 @@ class Creator(ABC):
 
         return result
 
+    def _direct_product(self) -> Optional[type]:
+        for klass in type(self).__mro__:
+            if "product" in vars(klass):
+                declared = vars(klass).get("create_car")
+                if declared is not None and type(self).create_car is declared:
+                    return klass.product
+                return None
+        return None
 
-class BMWCreator(Creator):
-    def create_car(self) -> Car:
-        return BMW()
+    def _cars(self, n: int) -> Iterator[Car]:
+        product = self._direct_product()
+        if product is not None:
+            return starmap(product, repeat((), n))
+        create_car = self.create_car
+        return (create_car() for _ in range(n))
 
+    def create_many(self, n: int) -> List[Car]:
+        """
+        Create `n` cars at once.
+        """
 
-class MercedesCreator(Creator):
-    def create_car(self) -> Car:
-        return Mercedes()
+        return list(self._cars(n))
+
+    def start_many(self, n: int) -> List[str]:
+        return [f'Creator: {car.operation()} was created' for car in self._cars(n)]
 
 
 class Car(ABC):
+    __slots__ = ()
+
     def operation(self) -> str:
         pass
 
 
 class BMW(Car):
+    __slots__ = ()
+
     def operation(self) -> str:
         return "{This is a BMW}"
 
 
 class Mercedes(Car):
+    __slots__ = ()
+
     def operation(self) -> str:
         return "{This is a Mercedes}"
 
 
+class BMWCreator(Creator):
+    product = BMW
+
+    def create_car(self) -> Car:
+        return BMW()
+
+
+class MercedesCreator(Creator):
+    product = Mercedes
+
+    def create_car(self) -> Car:
+        return Mercedes()
+
+
 def client_code(creator: Creator) -> None:
     print(f"Client: {creator.start_car()}", end="")
 
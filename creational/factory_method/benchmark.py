@@ -0,0 +1,41 @@
+"""
+Cost of producing many cars one start_car()/create_car() call at a time
+against the batch APIs, create_many() and start_many().
+
+    python benchmark.py [cars]
+"""
+
+import sys
+import time
+import tracemalloc
+from typing import Callable
+
+from FactoryMethod import *
+
+
+def measure(label: str, produce: Callable[[], object], cars: int, repeats: int = 3) -> None:
+    elapsed = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        produce()
+        elapsed = min(elapsed, time.perf_counter() - started)
+
+    tracemalloc.start()
+    result = produce()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+
+    print(f"{label:<32} {elapsed * 1e3:9.1f} ms {cars / elapsed:14.0f} cars/s {memory / 2 ** 20:9.2f} MiB")
+
+
+if __name__ == "__main__":
+    cars = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    creator = BMWCreator()
+
+    print(f"{cars} BMWs\n")
+    measure("start_car() loop", lambda: [creator.start_car() for _ in range(cars)], cars)
+    measure("start_many()", lambda: creator.start_many(cars), cars)
+    print()
+    measure("create_car() loop", lambda: [creator.create_car() for _ in range(cars)], cars)
+    measure("create_many()", lambda: creator.create_many(cars), cars)
@@ -0,0 +1,65 @@
+"""
+Bytes per live instance of the product classes of each creational pattern,
+measured with tracemalloc, next to a subclass of the same product that
+carries a per-instance __dict__ as the products used to.
+
+    python memory_benchmark.py [instances]
+"""
+
+import os
+import sys
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+for pattern in ("abstract_factory", "builder", "factory_method", "prototype"):
+    sys.path.insert(0, os.path.join(HERE, pattern))
+
+import AbstractFactoryClient
+import Builder
+import FactoryMethod
+import Prototype
+
+
+def with_dict(cls: type) -> type:
+    return type(f"{cls.__name__}WithDict", (cls,), {})
+
+
+def full_car(cls: type) -> object:
+    car = cls()
+    for part in ("Engine", "Wheels", "Brakes"):
+        car.add(part)
+    return car
+
+
+def bytes_per_instance(make, instances: int) -> float:
+    items = [None] * instances
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    for index in range(instances):
+        items[index] = make()
+    allocated = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return allocated / instances
+
+
+def report(pattern: str, label: str, make, instances: int) -> None:
+    print(f"{pattern:<18} {label:<28} {bytes_per_instance(make, instances):8.1f} B")
+
+
+if __name__ == "__main__":
+    instances = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+
+    print(f"{'pattern':<18} {'product':<28} {'per instance':>10}")
+    for cls in (AbstractFactoryClient.SedanBMW, AbstractFactoryClient.SuvMercedes):
+        report("abstract factory", cls.__name__, cls, instances)
+        report("abstract factory", with_dict(cls).__name__, with_dict(cls), instances)
+
+    for cls in (Builder.BMW, with_dict(Builder.BMW)):
+        report("builder", f"{cls.__name__}, 3 parts", lambda: full_car(cls), instances)
+
+    for cls in (FactoryMethod.BMW, FactoryMethod.Mercedes):
+        report("factory method", cls.__name__, cls, instances)
+        report("factory method", with_dict(cls).__name__, with_dict(cls), instances)
+
+    prototype = Prototype.Prototype(value="a-value", category="a")
+    report("prototype", "Prototype clone", prototype.clone, instances)
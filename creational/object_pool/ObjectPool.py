@@ -1,3 +1,15 @@
+from __future__ import annotations
+from bisect import bisect_left
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import inspect
+import threading
+import time
+import weakref
+
+
 class ObjectPool:
     def __init__(self, queue, auto_get=False):
         self._queue = queue
@@ -19,6 +31,594 @@ class ObjectPool:
             self.item = None
 
 
+
+class PoolTimeout(TimeoutError):
+    pass
+
+
+_DEFAULT = object()
+# Handed to a waiter in place of an object: a slot it may create one in.
+_CREATE = object()
+_NOTHING = object()
+
+
+class _Waiter:
+    """
+    A thread blocked in ResourcePool.acquire(), woken once it is handed an
+    object or a slot.
+    """
+
+    __slots__ = ("ready", "obj")
+
+    def __init__(self, lock: threading.Lock) -> None:
+        self.ready = threading.Condition(lock)
+        self.obj = _NOTHING
+
+
+class ResourcePool:
+    """
+    A thread-safe pool that creates its objects on demand with `factory`.
+
+    It keeps at least `min_size` objects alive and never more than
+    `max_size`. acquire() waits up to `timeout` seconds for one to be
+    returned, then raises PoolTimeout. Waiters are served in FIFO order: a
+    released object, or a freed slot, goes straight to the oldest one, and
+    newcomers do not take idle objects ahead of them. Objects failing `validate_on_borrow`
+    or `validate_on_return` are discarded through `destroy`, as are idle
+    objects above `min_size` once they have been idle for `max_idle`
+    seconds. Eviction is lazy: it runs on acquire() and release(), there is
+    no background thread. A hook that raises discards the object and frees
+    its slot before the exception propagates; errors destroying evicted
+    objects concern no caller, so they are only counted in stats().
+
+    get() and put() mirror queue.Queue, so ObjectPool(pool) works too, but
+    lease() returns objects deterministically instead of relying on __del__.
+    """
+
+    WAIT_BUCKETS = (0.0001, 0.001, 0.01, 0.1, 1.0, float("inf"))
+
+    def __init__(self, factory: Callable[[], Any], min_size: int = 0, max_size: int = 10,
+                 timeout: Optional[float] = None,
+                 validate_on_borrow: Optional[Callable[[Any], bool]] = None,
+                 validate_on_return: Optional[Callable[[Any], bool]] = None,
+                 max_idle: Optional[float] = None,
+                 destroy: Optional[Callable[[Any], None]] = None) -> None:
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError("Pool bounds must satisfy 0 <= min_size <= max_size, max_size >= 1.")
+
+        self._factory = factory
+        self._min_size = min_size
+        self._max_size = max_size
+        self._timeout = timeout
+        self._validate_on_borrow = validate_on_borrow
+        self._validate_on_return = validate_on_return
+        self._max_idle = max_idle
+        self._destroy = destroy
+
+        self._lock = threading.Lock()
+        self._waiters: Deque[_Waiter] = deque()
+        # Idle objects with the time they were returned; the newest on the
+        # right is handed out first, the oldest on the left is evicted first.
+        self._idle: Deque[Tuple[Any, float]] = deque()
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+
+        self._acquired = 0
+        self._created = 0
+        self._discarded = 0
+        self._timeouts = 0
+        self._destroy_errors = 0
+        self._wait_histogram = [0] * len(self.WAIT_BUCKETS)
+
+        for _ in range(min_size):
+            self._idle.append((self._create(), time.monotonic()))
+
+    def _create(self) -> Any:
+        obj = self._factory()
+        self._size += 1
+        self._created += 1
+        return obj
+
+    def _discard(self, objects: List[Any]) -> None:
+        """
+        Destroy objects already taken out of the pool's accounting. Every
+        object is destroyed even if one of the calls raises.
+        """
+
+        if self._destroy is None:
+            return
+        error = None
+        for obj in objects:
+            try:
+                self._destroy(obj)
+            except BaseException as exception:
+                error = error or exception
+        if error is not None:
+            raise error
+
+    def _evict(self, now: float) -> None:
+        """
+        Evict and destroy idle objects, before the caller takes anything
+        from the pool, so that a failing destroy cannot cost it its object.
+        """
+
+        with self._lock:
+            evicted = self._evict_idle(now)
+        for obj in evicted:
+            try:
+                self._discard([obj])
+            except Exception:
+                with self._lock:
+                    self._destroy_errors += 1
+
+    def _evict_idle(self, now: float) -> List[Any]:
+        """
+        Called with the lock held. Returns the objects to destroy.
+        """
+
+        evicted = []
+        if self._max_idle is not None:
+            while (self._idle and self._size > self._min_size
+                   and now - self._idle[0][1] > self._max_idle):
+                evicted.append(self._idle.popleft()[0])
+                self._size -= 1
+                self._discarded += 1
+        return evicted
+
+    def acquire(self, timeout: Optional[float] = _DEFAULT) -> Any:
+        if timeout is _DEFAULT:
+            timeout = self._timeout
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+
+        while True:
+            self._evict(time.monotonic())
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("The pool is closed.")
+                if self._idle and not self._waiters:
+                    obj = self._idle.pop()[0]
+                elif self._size < self._max_size and not self._waiters:
+                    # Reserve the slot so that concurrent callers respect max_size.
+                    self._size += 1
+                    obj = _CREATE
+                else:
+                    obj = self._wait(deadline, timeout)
+
+            if obj is _CREATE:
+                try:
+                    obj = self._factory()
+                except BaseException:
+                    with self._lock:
+                        self._hand_over(_CREATE)
+                    raise
+                with self._lock:
+                    self._created += 1
+            elif self._validate_on_borrow is not None:
+                try:
+                    valid = self._validate_on_borrow(obj)
+                except BaseException:
+                    self._drop(obj)
+                    raise
+                if not valid:
+                    self._drop(obj)
+                    continue
+
+            waited = time.monotonic() - started
+            with self._lock:
+                self._in_use += 1
+                self._acquired += 1
+                self._wait_histogram[bisect_left(self.WAIT_BUCKETS, waited)] += 1
+            return obj
+
+    def _wait(self, deadline: Optional[float], timeout: Optional[float]) -> Any:
+        """
+        Called with the lock held. Queue up and block until handed an object
+        or a slot.
+        """
+
+        waiter = _Waiter(self._lock)
+        self._waiters.append(waiter)
+        while waiter.obj is _NOTHING and not self._closed:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            waiter.ready.wait(remaining)
+
+        if waiter.obj is not _NOTHING:
+            return waiter.obj
+        self._waiters.remove(waiter)
+        if self._closed:
+            raise RuntimeError("The pool is closed.")
+        self._timeouts += 1
+        raise PoolTimeout(f"No pooled object available within {timeout} s.")
+
+    def _hand_over(self, obj: Any) -> None:
+        """
+        Called with the lock held. Give an object, or a slot already counted
+        in _size, to the oldest waiter. Without waiters objects become idle
+        and slots are freed.
+        """
+
+        if self._waiters:
+            waiter = self._waiters.popleft()
+            waiter.obj = obj
+            waiter.ready.notify()
+        elif obj is _CREATE:
+            self._size -= 1
+        else:
+            self._idle.append((obj, time.monotonic()))
+
+    def _drop(self, obj: Any) -> None:
+        with self._lock:
+            self._discarded += 1
+            if self._closed:
+                self._size -= 1
+            else:
+                # The freed slot goes to a waiter, if any, to create a replacement.
+                self._hand_over(_CREATE)
+        self._discard([obj])
+
+    def release(self, obj: Any) -> None:
+        try:
+            valid = self._validate_on_return is None or self._validate_on_return(obj)
+        except BaseException:
+            with self._lock:
+                self._in_use -= 1
+            self._drop(obj)
+            raise
+
+        with self._lock:
+            self._in_use -= 1
+            kept = valid and not self._closed
+            if kept:
+                self._hand_over(obj)
+        if kept:
+            self._evict(time.monotonic())
+        else:
+            self._drop(obj)
+
+    get = acquire
+    put = release
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = _DEFAULT) -> Iterator[Any]:
+        obj = self.acquire(timeout)
+        try:
+            yield obj
+        finally:
+            self.release(obj)
+
+    def close(self) -> None:
+        """
+        Destroy the idle objects and wake up waiters. Objects still in use
+        are destroyed when released.
+        """
+
+        with self._lock:
+            self._closed = True
+            idle = [obj for obj, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            for waiter in self._waiters:
+                waiter.ready.notify()
+        self._discard(idle)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waiters": len(self._waiters),
+                "acquired": self._acquired,
+                "created": self._created,
+                "discarded": self._discarded,
+                "timeouts": self._timeouts,
+                "destroy_errors": self._destroy_errors,
+                "wait_histogram": dict(zip(self.WAIT_BUCKETS, self._wait_histogram)),
+            }
+
+
+
+
+class AsyncResourcePool:
+    """
+    The asyncio counterpart of ResourcePool, with the same acquire/release
+    semantics. `factory` may be a plain or a coroutine function.
+
+    Waiters are served in FIFO order: a released object is handed straight
+    to the oldest waiter. A waiter cancelled or timed out just as it was
+    handed an object passes it on, so nothing leaks. start(), or entering
+    the pool with async with, pre-warms it in the background to `min_size`
+    idle objects so that first requests do not pay for construction.
+    """
+
+    WAIT_BUCKETS = ResourcePool.WAIT_BUCKETS
+
+    def __init__(self, factory: Callable[[], Any], min_size: int = 0, max_size: int = 10,
+                 timeout: Optional[float] = None,
+                 validate_on_borrow: Optional[Callable[[Any], bool]] = None,
+                 validate_on_return: Optional[Callable[[Any], bool]] = None,
+                 destroy: Optional[Callable[[Any], None]] = None) -> None:
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError("Pool bounds must satisfy 0 <= min_size <= max_size, max_size >= 1.")
+
+        self._factory = factory
+        self._min_size = min_size
+        self._max_size = max_size
+        self._timeout = timeout
+        self._validate_on_borrow = validate_on_borrow
+        self._validate_on_return = validate_on_return
+        self._destroy = destroy
+
+        self._idle: Deque[Any] = deque()
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+        self._warming: Optional[asyncio.Task] = None
+
+        self._acquired = 0
+        self._created = 0
+        self._discarded = 0
+        self._timeouts = 0
+        self._wait_histogram = [0] * len(self.WAIT_BUCKETS)
+
+    async def _new(self) -> Any:
+        """
+        Build an object for a slot already counted in _size.
+        """
+
+        try:
+            obj = self._factory()
+            if inspect.isawaitable(obj):
+                obj = await obj
+        except BaseException:
+            self._hand_over(_CREATE)
+            raise
+        self._created += 1
+        return obj
+
+    def start(self) -> asyncio.Task:
+        """
+        Fill the pool up to `min_size` idle objects in the background.
+        """
+
+        if self._warming is None or self._warming.done():
+            self._warming = asyncio.ensure_future(self._prewarm())
+        return self._warming
+
+    async def _prewarm(self) -> None:
+        while not self._closed and self._size < self._min_size:
+            self._size += 1
+            self._hand_over(await self._new())
+
+    def _hand_over(self, obj: Any) -> None:
+        """
+        Give an object, or the right to create one in a slot already
+        counted in _size, to the oldest waiter. Objects nobody waits for
+        become idle; unclaimed slots are freed.
+        """
+
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(obj)
+                return
+        if obj is _CREATE:
+            self._size -= 1
+        elif self._closed:
+            self._drop(obj)
+        else:
+            self._idle.append(obj)
+
+    def _drop(self, obj: Any) -> None:
+        self._discarded += 1
+        try:
+            if self._destroy is not None:
+                self._destroy(obj)
+        finally:
+            if self._closed:
+                self._size -= 1
+            else:
+                # The freed slot goes to a waiter, if any, to create a replacement.
+                self._hand_over(_CREATE)
+                if self._size < self._min_size:
+                    self.start()
+
+    async def acquire(self, timeout: Optional[float] = _DEFAULT) -> Any:
+        if self._closed:
+            raise RuntimeError("The pool is closed.")
+        if timeout is _DEFAULT:
+            timeout = self._timeout
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+
+        while True:
+            if self._idle and not self._waiters:
+                obj = self._idle.pop()
+            elif self._size < self._max_size and not self._waiters:
+                self._size += 1
+                obj = _CREATE
+            else:
+                waiter = loop.create_future()
+                self._waiters.append(waiter)
+                try:
+                    obj = await asyncio.wait_for(asyncio.shield(waiter), timeout)
+                except BaseException as error:
+                    if waiter.done() and not waiter.cancelled():
+                        # Handed an object just as we gave up: pass it on.
+                        self._hand_over(waiter.result())
+                    else:
+                        waiter.cancel()
+                    if isinstance(error, asyncio.TimeoutError):
+                        self._timeouts += 1
+                        raise PoolTimeout(f"No pooled object available within {timeout} s.") from None
+                    raise
+                if self._closed:
+                    if obj is _CREATE:
+                        self._size -= 1
+                    elif obj is not None:
+                        self._drop(obj)
+                    raise RuntimeError("The pool is closed.")
+
+            if obj is _CREATE:
+                obj = await self._new()
+            elif self._validate_on_borrow is not None:
+                try:
+                    valid = self._validate_on_borrow(obj)
+                except BaseException:
+                    self._drop(obj)
+                    raise
+                if not valid:
+                    self._drop(obj)
+                    continue
+
+            self._in_use += 1
+            self._acquired += 1
+            self._wait_histogram[bisect_left(self.WAIT_BUCKETS, loop.time() - started)] += 1
+            return obj
+
+    def release(self, obj: Any) -> None:
+        """
+        Synchronous, so it cannot be interrupted by a cancellation.
+        """
+
+        self._in_use -= 1
+        try:
+            valid = self._validate_on_return is None or self._validate_on_return(obj)
+        except BaseException:
+            self._drop(obj)
+            raise
+        if self._closed or not valid:
+            self._drop(obj)
+        else:
+            self._hand_over(obj)
+
+    @asynccontextmanager
+    async def lease(self, timeout: Optional[float] = _DEFAULT) -> AsyncIterator[Any]:
+        obj = await self.acquire(timeout)
+        try:
+            yield obj
+        finally:
+            self.release(obj)
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._warming is not None:
+            self._warming.cancel()
+            await asyncio.gather(self._warming, return_exceptions=True)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+        while self._idle:
+            self._drop(self._idle.pop())
+
+    async def __aenter__(self) -> AsyncResourcePool:
+        self.start()
+        return self
+
+    async def __aexit__(self, Type, value, traceback) -> None:
+        await self.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self._size,
+            "in_use": self._in_use,
+            "idle": len(self._idle),
+            "waiters": sum(not waiter.done() for waiter in self._waiters),
+            "acquired": self._acquired,
+            "created": self._created,
+            "discarded": self._discarded,
+            "timeouts": self._timeouts,
+            "wait_histogram": dict(zip(self.WAIT_BUCKETS, self._wait_histogram)),
+        }
+
+
+
+class _Magazine:
+    """
+    A thread's cached objects. When the thread ends its thread-local storage
+    drops the magazine, and a finalizer hands the objects back.
+    """
+
+    __slots__ = ("items", "__weakref__")
+
+    def __init__(self, put: Callable[[Any], None]) -> None:
+        self.items: List[Any] = []
+        weakref.finalize(self, _return_all, put, self.items)
+
+
+def _return_all(put: Callable[[Any], None], items: List[Any]) -> None:
+    while items:
+        put(items.pop())
+
+
+class ThreadCachedPool:
+    """
+    A per-thread cache in front of a shared pool (a queue.Queue or anything
+    with get() and put(), such as ResourcePool), after magazine allocators.
+
+    Each thread keeps up to `magazine_size` released objects and serves its
+    next acquisitions from them without taking any lock. The shared pool is
+    only touched on a miss, or on overflow, when half of the magazine goes
+    back at once. Objects cached by one thread are not visible to others, so
+    the shared pool should hold more objects than the threads cache.
+
+    To the shared pool, objects in a magazine are still borrowed. In front
+    of a ResourcePool, magazine hits skip its validate_on_borrow, and
+    releases into a magazine skip validate_on_return and max_idle eviction.
+    Its close() does not reach cached objects, and its stats() count them
+    as in use. Call flush() in each thread before closing the shared pool.
+    """
+
+    def __init__(self, shared: Any, magazine_size: int = 8) -> None:
+        if magazine_size < 1:
+            raise ValueError("magazine_size must be at least 1.")
+        self._shared = shared
+        self._magazine_size = magazine_size
+        self._local = threading.local()
+
+    def _magazine(self) -> List[Any]:
+        try:
+            return self._local.magazine.items
+        except AttributeError:
+            self._local.magazine = _Magazine(self._shared.put)
+            return self._local.magazine.items
+
+    def get(self, *args: Any, **kwargs: Any) -> Any:
+        magazine = self._magazine()
+        if magazine:
+            return magazine.pop()
+        return self._shared.get(*args, **kwargs)
+
+    def put(self, obj: Any) -> None:
+        magazine = self._magazine()
+        if len(magazine) >= self._magazine_size:
+            put = self._shared.put
+            for _ in range(self._magazine_size // 2 or 1):
+                put(magazine.pop(0))
+        magazine.append(obj)
+
+    def flush(self) -> None:
+        """
+        Return the calling thread's cached objects to the shared pool.
+        """
+
+        _return_all(self._shared.put, self._magazine())
+
+    @contextmanager
+    def lease(self) -> Iterator[Any]:
+        obj = self.get()
+        try:
+            yield obj
+        finally:
+            self.put(obj)
+
+
 if __name__ == "__main__":
     import queue
 
@@ -42,3 +642,17 @@ if __name__ == "__main__":
     if not sample_queue.empty():
         print(sample_queue.get())
 
+    resource_pool = ResourcePool(lambda: object(), max_size=1, timeout=0.1)
+    with ObjectPool(resource_pool) as obj:
+        print('Inside with: {}'.format(obj))
+
+    with resource_pool.lease() as obj:
+        print('Inside lease: {}'.format(obj))
+    print(resource_pool.stats())
+
+    async def async_demo():
+        async with AsyncResourcePool(lambda: object(), min_size=1, max_size=1) as async_pool:
+            async with async_pool.lease() as obj:
+                print('Inside async lease: {}'.format(obj))
+
+    asyncio.run(async_demo())
@@ -0,0 +1,140 @@
+"""
+Many threads borrowing from a small pool: throughput of ResourcePool.lease()
+against the ObjectPool wrapper over a pre-filled queue.Queue, and the wait
+time histogram the pool exports. Then AsyncResourcePool with a fake
+connection that takes `setup` seconds to open: first-request latency with
+and without pre-warming, and throughput of many tasks sharing the pool.
+Last, acquire/release throughput by thread count for a shared queue.Queue
+with and without a ThreadCachedPool in front of it.
+
+    python benchmark.py [threads] [borrows per thread] [setup]
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import queue
+import sys
+import time
+
+from ObjectPool import *
+
+
+class Connection:
+    def __init__(self) -> None:
+        time.sleep(0.001)
+
+    def query(self) -> None:
+        # Yield the GIL while holding the object so that borrowers queue up.
+        time.sleep(0)
+
+
+class FakeConnection:
+    """
+    A stand-in for a network connection with a configurable setup cost.
+    """
+
+    def __init__(self, setup: float) -> None:
+        self._setup = setup
+
+    async def open(self) -> "FakeConnection":
+        await asyncio.sleep(self._setup)
+        return self
+
+    async def query(self) -> None:
+        await asyncio.sleep(0)
+
+
+async def first_request(setup: float, prewarm: bool) -> float:
+    async with AsyncResourcePool(lambda: FakeConnection(setup).open(), min_size=4 if prewarm else 0,
+                                 max_size=4) as pool:
+        # The application starting up, while the pool warms in the background.
+        await asyncio.sleep(setup * 2)
+        started = time.perf_counter()
+        async with pool.lease() as connection:
+            await connection.query()
+        return time.perf_counter() - started
+
+
+async def async_throughput(setup: float, tasks: int, borrows: int) -> float:
+    async with AsyncResourcePool(lambda: FakeConnection(setup).open(), min_size=4, max_size=4) as pool:
+        async def worker() -> None:
+            for _ in range(borrows):
+                async with pool.lease() as connection:
+                    await connection.query()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(tasks)))
+        return tasks * borrows / (time.perf_counter() - started)
+
+
+def run(label: str, borrow: Callable[[], None], threads: int, borrows: int) -> float:
+    def worker() -> None:
+        for _ in range(borrows):
+            borrow()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        for future in [executor.submit(worker) for _ in range(threads)]:
+            future.result()
+    elapsed = time.perf_counter() - started
+    if label:
+        print(f"{label:<28} {threads * borrows / elapsed:12.0f} borrows/s")
+    return threads * borrows / elapsed
+
+
+if __name__ == "__main__":
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    borrows = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+    setup = float(sys.argv[3]) if len(sys.argv) > 3 else 0.05
+    size = 4
+
+    print(f"{threads} threads, {borrows} borrows each, {size} objects\n")
+
+    connections = queue.Queue()
+    for _ in range(size):
+        connections.put(Connection())
+
+    def borrow_queue() -> None:
+        with ObjectPool(connections) as connection:
+            connection.query()
+
+    run("ObjectPool over queue.Queue", borrow_queue, threads, borrows)
+
+    pool = ResourcePool(Connection, min_size=size, max_size=size, timeout=5.0,
+                        validate_on_return=lambda connection: True)
+
+    def borrow_pool() -> None:
+        with pool.lease() as connection:
+            connection.query()
+
+    run("ResourcePool.lease()", borrow_pool, threads, borrows)
+
+    stats = pool.stats()
+    print(f"\nacquired {stats['acquired']}, created {stats['created']}, timeouts {stats['timeouts']}")
+    for bound, count in stats["wait_histogram"].items():
+        print(f"  wait <= {bound * 1e3:>8.1f} ms {count:10}")
+
+    print(f"\nAsyncResourcePool, connections take {setup * 1e3:.0f} ms to open")
+    for prewarm in (False, True):
+        latency = asyncio.run(first_request(setup, prewarm))
+        print(f"  first request, {'pre-warmed' if prewarm else 'cold':<12} {latency * 1e3:10.2f} ms")
+    rate = asyncio.run(async_throughput(setup, threads, borrows))
+    print(f"  {threads} tasks sharing 4 connections {rate:10.0f} borrows/s")
+
+    print(f"\n{'threads':>8} {'queue.Queue':>14} {'thread cached':>14}  borrows/s")
+    for count in sorted({1, 2, 4, 8, threads}):
+        shared = queue.Queue()
+        for _ in range(count * 16):
+            shared.put(object())
+        cached = ThreadCachedPool(shared)
+
+        def borrow_shared() -> None:
+            with ObjectPool(shared):
+                pass
+
+        def borrow_cached() -> None:
+            with ObjectPool(cached):
+                pass
+
+        print(f"{count:>8} {run('', borrow_shared, count, borrows):>14.0f} "
+              f"{run('', borrow_cached, count, borrows):>14.0f}")
@@ -1,29 +1,267 @@
 from __future__ import annotations
-from typing import Any
+from collections import OrderedDict
+from copy import copy, deepcopy
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+SHALLOW, DEEP, LAZY, AUTO = "shallow", "deep", "lazy", "auto"
+
+# A clone's "lazy" attributes not read yet, kept in a slot outside __dict__.
+_PENDING = "_lazy_pending"
+_MUTABLE = frozenset({list, dict, set, bytearray})
+_MISSING = object()
+
+
+class ClonePlan:
+    """
+    How to clone the instances of one class, resolved once from the
+    `clone_policy` mappings along its MRO and `clone_default`:
+
+    - "shallow" shares the value with the clone;
+    - "deep" gives the clone a deep copy;
+    - "lazy" copies on first access, not on write: the clone refers to the
+      source's value and takes a shallow copy of it the first time the
+      attribute is read. Until then the value is aliased, so in-place
+      changes the source makes show through in the clone and in clones
+      taken from it;
+    - "auto" uses "lazy" for lists, dicts, sets and bytearrays and
+      "shallow" for everything else.
+
+    "shallow" is the default, as it was for the __dict__-copying clone;
+    "lazy" and "auto" are opt-in for prototypes that are not mutated in
+    place once cloned. Clones are created without running __init__. Until
+    they are read, "lazy" attributes are not in the clone's __dict__.
+    """
+
+    __slots__ = ("policy", "default")
+
+    _plans: Dict[type, ClonePlan] = {}
+
+    def __init__(self, policy: Dict[str, str], default: str) -> None:
+        for mode in (*policy.values(), default):
+            if mode not in (SHALLOW, DEEP, LAZY, AUTO):
+                raise ValueError(f"Unknown clone policy {mode!r}.")
+        self.policy = policy
+        self.default = default
+
+    @classmethod
+    def for_class(cls, klass: type) -> ClonePlan:
+        plan = cls._plans.get(klass)
+        if plan is None:
+            policy: Dict[str, str] = {}
+            for base in reversed(klass.__mro__):
+                policy.update(vars(base).get("clone_policy", {}))
+            plan = cls._plans[klass] = ClonePlan(policy, klass.clone_default)
+        return plan
+
+    def clone(self, source: Any, overrides: Dict[str, Any]) -> Any:
+        klass = type(source)
+        obj = klass.__new__(klass)
+        state = source.__dict__
+        policy = self.policy
+        default = self.default
+
+        shared: Dict[str, Any] = {}
+        snapshots: Dict[str, Any] = dict(source._lazy_pending or ())
+        for name, value in state.items():
+            if name in overrides:
+                continue
+            mode = policy.get(name, default)
+            if mode == AUTO:
+                mode = LAZY if type(value) in _MUTABLE else SHALLOW
+            if mode == SHALLOW:
+                shared[name] = value
+            elif mode == DEEP:
+                shared[name] = deepcopy(value)
+            else:
+                snapshots[name] = value
+
+        for name in list(snapshots):
+            if name in overrides or name in shared:
+                del snapshots[name]
+            elif policy.get(name, default) == DEEP:
+                shared[name] = deepcopy(snapshots.pop(name))
+
+        shared.update(overrides)
+        obj.__dict__.update(shared)
+        object.__setattr__(obj, _PENDING, snapshots or None)
+        return obj
+
 
 class Prototype:
+    """
+    Subclasses choose per attribute how clones get their values by mapping
+    attribute names to "shallow", "deep", "lazy" or "auto" in `clone_policy`;
+    other attributes follow `clone_default`. See ClonePlan; "lazy" copies on
+    first access, not on write.
+    """
+
+    __slots__ = ("__dict__", "__weakref__", _PENDING)
+
+    clone_policy: Dict[str, str] = {}
+    clone_default = SHALLOW
+
     def __init__(self, value: str = 'default', **attrs: Any) -> None:
+        object.__setattr__(self, _PENDING, None)
         self.value = value
         self.__dict__.update(attrs)
 
-    def clone(self, **attrs: Any) -> Prototype:
-        obj = self.__class__(**self.__dict__)
-        obj.__dict__.update(attrs)
+    def __getattr__(self, name: str) -> Any:
+        # Only reached for attributes missing from __dict__, and for the
+        # pending slot while it is unset.
+        if name == _PENDING:
+            return None
+        pending = self._lazy_pending
+        if not pending or name not in pending:
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+        value = self.__dict__[name] = copy(pending.pop(name))
+        return value
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        pending = self._lazy_pending
+        if pending:
+            pending.pop(name, None)
+        object.__setattr__(self, name, value)
+
+    def __delattr__(self, name: str) -> None:
+        pending = self._lazy_pending
+        if pending and pending.pop(name, _MISSING) is not _MISSING:
+            return
+        object.__delattr__(self, name)
+
+    def __copy__(self) -> Prototype:
+        obj = type(self).__new__(type(self))
+        obj.__dict__.update(self.__dict__)
+        object.__setattr__(obj, _PENDING, dict(self._lazy_pending or ()) or None)
         return obj
 
+    def clone(self, **attrs: Any) -> Prototype:
+        return ClonePlan.for_class(type(self)).clone(self, attrs)
+
 
 class PrototypeDispatcher:
-    def __init__(self):
+    """
+    A registry of named prototypes.
+
+    Attributes listed in `indexes`, or added later with add_index(), are
+    kept in secondary indexes so that find() does not scan every prototype.
+    clone() and clone_many() keep the last `cache_size` templates, a
+    prototype with its overrides applied, so repeated clones with the same
+    overrides start from a ready template. Templates of a name are dropped
+    when it is registered again or unregistered; re-register a prototype
+    after changing it in place.
+    """
+
+    def __init__(self, indexes: Iterable[str] = (), cache_size: int = 128):
         self._objects = {}
+        self._indexes: Dict[str, Dict[Any, Set[str]]] = {}
+        # Names whose indexed attribute is missing or unhashable.
+        self._unindexed: Dict[str, Set[str]] = {}
+        # The value each (name, attribute) was indexed under, so that a
+        # prototype changed in place is unindexed from the right bucket.
+        self._indexed_values: Dict[Tuple[str, str], Any] = {}
+        self._cache_size = cache_size
+        self._templates: OrderedDict[Tuple[str, frozenset], Prototype] = OrderedDict()
+        for attribute in indexes:
+            self.add_index(attribute)
 
     def get_objects(self) -> dict[str, Prototype]:
         return self._objects
 
+    def add_index(self, attribute: str) -> None:
+        if attribute in self._indexes:
+            return
+        self._indexes[attribute] = {}
+        self._unindexed[attribute] = set()
+        for name, obj in self._objects.items():
+            self._index(attribute, name, obj)
+
+    def _index(self, attribute: str, name: str, obj: Prototype) -> None:
+        value = getattr(obj, attribute, _MISSING)
+        try:
+            self._indexes[attribute].setdefault(value, set()).add(name)
+        except TypeError:
+            self._unindexed[attribute].add(name)
+        else:
+            self._indexed_values[name, attribute] = value
+
+    def _unindex(self, attribute: str, name: str) -> None:
+        self._unindexed[attribute].discard(name)
+        value = self._indexed_values.pop((name, attribute), _MISSING)
+        names = self._indexes[attribute].get(value)
+        if names is not None:
+            names.discard(name)
+            if not names:
+                del self._indexes[attribute][value]
+
+    def _forget_templates(self, name: str) -> None:
+        for key in [key for key in self._templates if key[0] == name]:
+            del self._templates[key]
+
     def register_object(self, name: str, obj: Prototype) -> None:
+        if name in self._objects:
+            self.unregister_object(name)
         self._objects[name] = obj
+        for attribute in self._indexes:
+            self._index(attribute, name, obj)
 
     def unregister_object(self, name: str) -> None:
         del self._objects[name]
+        for attribute in self._indexes:
+            self._unindex(attribute, name)
+        self._forget_templates(name)
+
+    def find(self, **criteria: Any) -> Dict[str, Prototype]:
+        """
+        The prototypes whose attributes equal all of `criteria`.
+        """
+
+        candidates: Optional[Set[str]] = None
+        scanned = {}
+        for attribute, value in criteria.items():
+            if attribute not in self._indexes:
+                scanned[attribute] = value
+                continue
+            try:
+                names = self._indexes[attribute].get(value, set())
+            except TypeError:
+                names = set()
+            names = names | {name for name in self._unindexed[attribute]
+                             if getattr(self._objects[name], attribute, _MISSING) == value}
+            candidates = names if candidates is None else candidates & names
+            if not candidates:
+                return {}
+
+        objects = self._objects
+        found = objects if candidates is None else {name: objects[name] for name in candidates}
+        if scanned:
+            found = {name: obj for name, obj in found.items()
+                     if all(getattr(obj, attribute, _MISSING) == value
+                            for attribute, value in scanned.items())}
+        return dict(found)
+
+    def _template(self, name: str, overrides: Dict[str, Any]) -> Prototype:
+        if not overrides:
+            return self._objects[name]
+        try:
+            key = (name, frozenset(overrides.items()))
+        except TypeError:
+            return self._objects[name].clone(**overrides)
+
+        template = self._templates.get(key)
+        if template is None:
+            template = self._templates[key] = self._objects[name].clone(**overrides)
+            if len(self._templates) > self._cache_size:
+                self._templates.popitem(last=False)
+        else:
+            self._templates.move_to_end(key)
+        return template
+
+    def clone(self, name: str, **overrides: Any) -> Prototype:
+        return self._template(name, overrides).clone()
+
+    def clone_many(self, name: str, n: int, **overrides: Any) -> List[Prototype]:
+        clone = self._template(name, overrides).clone
+        return [clone() for _ in range(n)]
 
 
 if __name__ == '__main__':
@@ -41,4 +279,8 @@ if __name__ == '__main__':
     objs = [{n: p.value} for n, p in dispatcher.get_objects().items()]
     print(objs)
 
-    print(b.category, b.is_checked)
\ No newline at end of file
+    print(b.category, b.is_checked)
+
+    dispatcher.add_index('category')
+    print(list(dispatcher.find(category='a')))
+    print([c.value for c in dispatcher.clone_many('objecta', 2, value='c-value')])
@@ -0,0 +1,91 @@
+"""
+Clones per second and memory per clone for a large prototype: a few dozen
+scalar attributes and a handful of large lists. Compares the former
+`self.__class__(**self.__dict__)` clone, copy.deepcopy, and the clone
+engine sharing values (the "shallow" default), copying lists on first
+access (the opt-in "auto" policy) and with deep copies.
+Then PrototypeDispatcher.find() over tens of thousands of prototypes with
+and without an index on the queried attribute.
+
+    python benchmark.py [clones] [prototypes]
+"""
+
+from copy import deepcopy
+import sys
+import time
+import tracemalloc
+from typing import Callable
+
+from Prototype import *
+
+
+class LegacyPrototype(Prototype):
+    def clone(self, **attrs: Any) -> Prototype:
+        obj = self.__class__(**self.__dict__)
+        obj.__dict__.update(attrs)
+        return obj
+
+
+class DeepPrototype(Prototype):
+    clone_default = DEEP
+
+
+class AutoPrototype(Prototype):
+    clone_default = AUTO
+
+
+def large(cls: type) -> Prototype:
+    attrs = {f"field_{index}": index for index in range(40)}
+    attrs.update({f"rows_{index}": list(range(10_000)) for index in range(4)})
+    return cls(value="large", **attrs)
+
+
+def measure(label: str, clone: Callable[[], Prototype], clones: int) -> None:
+    started = time.perf_counter()
+    for _ in range(clones):
+        clone()
+    elapsed = time.perf_counter() - started
+
+    held = max(clones // 10, 1)
+    tracemalloc.start()
+    result = [clone() for _ in range(held)]
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+
+    print(f"{label:<28} {clones / elapsed:12.0f} clones/s {memory / held / 1024:10.1f} KiB/clone")
+
+
+if __name__ == "__main__":
+    clones = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+
+    print(f"{clones} clones of a prototype with 40 ints and 4 lists of 10k ints\n")
+    legacy = large(LegacyPrototype)
+    measure("__class__(**__dict__)", legacy.clone, clones)
+    measure("copy.deepcopy", lambda: deepcopy(legacy), clones // 10)
+    measure("clone engine, deep", large(DeepPrototype).clone, clones // 10)
+    measure("clone engine, shallow", large(Prototype).clone, clones)
+    measure("clone engine, auto (lazy)", large(AutoPrototype).clone, clones)
+
+    touched = large(AutoPrototype)
+
+    def clone_and_write() -> Prototype:
+        clone = touched.clone()
+        clone.rows_0.append(1)
+        return clone
+
+    measure("auto (lazy), one list read", clone_and_write, clones)
+
+    prototypes = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    lookups = 200
+    print(f"\n{lookups} find(category=...) over {prototypes} prototypes in 100 categories\n")
+    for label, dispatcher in (("full scan", PrototypeDispatcher()),
+                              ("indexed", PrototypeDispatcher(indexes=["category"]))):
+        for index in range(prototypes):
+            dispatcher.register_object(f"prototype-{index}",
+                                       Prototype(value=str(index), category=f"c{index % 100}"))
+        started = time.perf_counter()
+        for lookup in range(lookups):
+            dispatcher.find(category=f"c{lookup % 100}")
+        elapsed = time.perf_counter() - started
+        print(f"{label:<28} {elapsed / lookups * 1e6:12.1f} us/find")